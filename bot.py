@@ -1,22 +1,38 @@
+import asyncio
 import os
+import warnings
+from telegram import Update
 from telegram.ext import (
     Application,
     CommandHandler,
     CallbackQueryHandler,
+    InlineQueryHandler,
     MessageHandler,
     ConversationHandler,
+    TypeHandler,
     filters,
 )
+from telegram.warnings import PTBUserWarning
 from dotenv import load_dotenv
 from handlers import (
     start,
     prompt_search_query,
     execute_search,
+    show_search_page,
     execute_analyze,
     prompt_analyze_query,
     about_action,
+    inline_search,
+    subscribe_command,
+    unsubscribe_command,
+    subscriptions_command,
+    subscription_jobs,
 )
 from handlers.common import handle_new_query, handle_back
+from handlers.cluster_handler import route_update, run_worker
+from services.persistence_service import SharedPersistence
+from services.schema_service import run_maintenance_loop
+from services.state_service import INSTANCE_COUNT, INSTANCE_INDEX, STATE_BACKEND
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -28,14 +44,64 @@ SEARCH_WAITING_FOR_QUERY = int(os.getenv("SEARCH_WAITING_FOR_QUERY"))
 if not BOT_TOKEN:
     raise ValueError("Токен бота отсутствует. Проверьте файл .env.")
 
+# Очереди разделов в памяти процесса недоступны другим экземплярам: их обновления просто потерялись бы
+if INSTANCE_COUNT > 1 and STATE_BACKEND != "redis":
+    raise ValueError("Для нескольких экземпляров (INSTANCE_COUNT > 1) укажите STATE_BACKEND=redis в файле .env.")
 
-def main():
-    """Основная функция для запуска Telegram-бота."""
+# Ссылки на фоновые задачи, чтобы их не удалил сборщик мусора
+_background_tasks = []
+
+
+async def start_background_jobs(application: Application):
+    """
+    Запускает фоновые задачи: отправку уведомлений, проверку подписок и обслуживание базы данных.
+    post_init вызывается только при опросе Telegram, поэтому задачи выполняет один экземпляр.
+    """
+    # Задачи бесконечные, поэтому создаются до запуска приложения: иначе stop() ждал бы их завершения.
+    # Предупреждение PTB именно об этом, а ошибки задач по-прежнему попадают в обработчики ошибок
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", PTBUserWarning)
+        for job in subscription_jobs(application) + [run_maintenance_loop()]:
+            _background_tasks.append(application.create_task(job))
+
+
+async def stop_background_jobs(application: Application):
+    """Останавливает фоновые задачи при остановке бота."""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+
+
+def build_application(token: str = BOT_TOKEN, base_url: str = None) -> Application:
+    """
+    Создает приложение со всеми обработчиками бота.
+    :param token: Токен Telegram-бота.
+    :param base_url: Адрес Bot API (по умолчанию api.telegram.org), например, для нагрузочного тестирования.
+    :return: Настроенное приложение.
+    """
     # Создаем приложение с использованием токена
-    application = Application.builder().token(BOT_TOKEN).build()
+    builder = Application.builder().token(token)
+    if base_url:
+        builder = builder.base_url(base_url)
+
+    # Состояния диалогов и user_data хранятся в общем хранилище, доступном всем экземплярам
+    application = (
+        builder.persistence(SharedPersistence())
+        .post_init(start_background_jobs)
+        .post_stop(stop_background_jobs)
+        .build()
+    )
+
+    # В многоэкземплярном режиме каждое обновление обрабатывает экземпляр, отвечающий за его чат
+    if INSTANCE_COUNT > 1:
+        application.add_handler(TypeHandler(Update, route_update), group=-1)
 
     # Регистрация обработчиков команд
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("subscribe", subscribe_command))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+    application.add_handler(CommandHandler("subscriptions", subscriptions_command))
 
     # ConversationHandler для поиска
     application.add_handler(
@@ -44,11 +110,14 @@ def main():
             states={
                 SEARCH_WAITING_FOR_QUERY: [
                     CallbackQueryHandler(execute_search, pattern="^search_query_"),
+                    CallbackQueryHandler(show_search_page, pattern="^search_page_"),
                     CallbackQueryHandler(handle_new_query, pattern="^search_new_query$"),
                     MessageHandler(filters.TEXT & ~filters.COMMAND, execute_search),
                 ],
             },
             fallbacks=[CallbackQueryHandler(handle_back, pattern="^action_back$")],  # Используем handle_back
+            name="search_conversation",
+            persistent=True,
         )
     )
 
@@ -59,25 +128,40 @@ def main():
             states={
                 ANALYZE_WAITING_FOR_QUERY: [
                     CallbackQueryHandler(execute_analyze, pattern="^analyze_query_"),
-                    CallbackQueryHandler(handle_new_query, pattern="^analyze_new_query$"),
+                    CallbackQueryHandler(handle_new_query, pattern="^analyze_(new_query|compare)$"),
                     MessageHandler(filters.TEXT & ~filters.COMMAND, execute_analyze),
                 ],
             },
             fallbacks=[CallbackQueryHandler(handle_back, pattern="^action_back$")],  # Используем handle_back
+            name="analyze_conversation",
+            persistent=True,
         )
     )
 
+    # Inline-поиск вакансий; block=False, чтобы пауза между нажатиями клавиш не задерживала другие обновления
+    application.add_handler(InlineQueryHandler(inline_search, block=False))
+
     # CallbackHandler для раздела "О боте"
     application.add_handler(CallbackQueryHandler(about_action, pattern="^action_about$"))
 
     # CallbackHandler для кнопки "Назад"
     application.add_handler(CallbackQueryHandler(handle_back, pattern="^action_back$"))
 
+    return application
+
+
+def main():
+    """Основная функция для запуска Telegram-бота."""
+    application = build_application()
+
     # Лог успешного запуска
-    print("Бот запущен. Ожидаем взаимодействия с пользователями...")
+    print(f"Бот запущен (экземпляр {INSTANCE_INDEX + 1} из {INSTANCE_COUNT}). Ожидаем взаимодействия с пользователями...")
 
-    # Запускаем бота
-    application.run_polling()
+    # Опрашивает Telegram только первый экземпляр, остальные получают обновления из очереди своего раздела
+    if INSTANCE_INDEX == 0:
+        application.run_polling()
+    else:
+        asyncio.run(run_worker(application))
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from handlers.start_handler import start
 from handlers.search_handler import (
     prompt_search_query,
     execute_search,
+    show_search_page,
 )
 from handlers.analyze_handler import (
     prompt_analyze_query,
@@ -9,3 +10,10 @@ from handlers.analyze_handler import (
 )
 from handlers.common import display_main_menu
 from handlers.about_handler import about_action
+from handlers.inline_handler import inline_search
+from handlers.subscription_handler import (
+    subscribe_command,
+    unsubscribe_command,
+    subscriptions_command,
+    subscription_jobs,
+)
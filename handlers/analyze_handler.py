@@ -1,4 +1,9 @@
+import asyncio
+import html
 import os
+import re
+import time
+from collections import Counter
 
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -8,21 +13,33 @@ from handlers.common import send_menu, generate_back_button
 from services import (
     process_vacancies,
     add_to_search_history,
-    fetch_vacancies
+    fetch_many_queries,
+    compare_vacancies,
+    format_comparison_output,
 )
 
 from services.database_service import get_last_searches
+from services.dedup_service import VacancyDeduplicator
+from services.partition_service import PartitionedFetch
+from services.state_service import acquire_user_lock, release_user_lock
 
 # Загрузка переменных окружения
 load_dotenv()
 
 ANALYZE_WAITING_FOR_QUERY = int(os.getenv("ANALYZE_WAITING_FOR_QUERY"))
+# Сколько вакансий загружать по каждому запросу в режиме сравнения
+COMPARE_VACANCIES_PER_QUERY = int(os.getenv("COMPARE_VACANCIES_PER_QUERY", 1000))
+# Максимальное число сравниваемых запросов
+COMPARE_MAX_QUERIES = int(os.getenv("COMPARE_MAX_QUERIES", 4))
+# Как часто обновлять сообщение о прогрессе анализа (секунды), чтобы не упереться в лимиты Telegram
+PROGRESS_UPDATE_INTERVAL = 2.5
 
 async def prompt_analyze_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Предлагает пользователю ввести запрос для анализа навыков или выбрать запрос из истории.
     """
     user_id = update.callback_query.from_user.id
+    context.user_data.pop("analyze_compare", None)
 
     # Получаем историю запросов пользователя
     history = await get_last_searches(user_id=user_id, limit=5)
@@ -35,6 +52,7 @@ async def prompt_analyze_query(update: Update, context: ContextTypes.DEFAULT_TYP
 
     # Добавляем кнопку для ввода нового запроса и возврата
     buttons.append([InlineKeyboardButton("Ввести новый запрос для анализа", callback_data="analyze_new_query")])
+    buttons.append([InlineKeyboardButton("Сравнить несколько запросов", callback_data="analyze_compare")])
     buttons.append([InlineKeyboardButton("⬅️ Назад", callback_data="action_back")])
 
     reply_markup = InlineKeyboardMarkup(buttons)
@@ -44,8 +62,89 @@ async def prompt_analyze_query(update: Update, context: ContextTypes.DEFAULT_TYP
     return ANALYZE_WAITING_FOR_QUERY
 
 
+def format_duplicates_line(deduplicator: VacancyDeduplicator) -> str:
+    """Строка отчета о схлопнутых повторах вакансий (пустая, если повторов нет)."""
+    if not deduplicator.collapsed:
+        return ""
+    return (
+        f"🧹 <b>Исключено повторов:</b> {deduplicator.collapsed} "
+        f"(точных: {deduplicator.exact_duplicates}, похожих: {deduplicator.near_duplicates})\n"
+    )
+
+
+def parse_compare_queries(query: str) -> list:
+    """
+    Разбивает текст на запросы для сравнения: «python, go, java» или «python vs go».
+    :return: Список уникальных запросов (один элемент, если сравнивать нечего).
+    """
+    queries = []
+    for part in re.split(r",|;|\s+vs\s+", query, flags=re.IGNORECASE):
+        part = part.strip()
+        if part and part.lower() not in [existing.lower() for existing in queries]:
+            queries.append(part)
+    return queries or [query]
+
+
+async def execute_comparison(context: ContextTypes.DEFAULT_TYPE, chat_id: int, queries: list):
+    """
+    Сравнивает навыки по нескольким запросам.
+    Страницы всех запросов загружаются параллельно, общие вакансии анализируются один раз.
+    """
+    progress_message = await context.bot.send_message(
+        chat_id=chat_id,
+        text="🔄 Прогресс загрузки: 0%"
+    )
+
+    total_expected = COMPARE_VACANCIES_PER_QUERY * len(queries)
+    progress = {"loaded": 0, "text": progress_message.text}
+
+    async def on_page(loaded: int):
+        progress["loaded"] += loaded
+        # Обновляем сообщение не чаще, чем раз в 10%
+        percent = min(progress["loaded"] * 100 // total_expected // 10 * 10, 100)
+        new_progress_text = f"🔄 Прогресс загрузки: {percent}%"
+        if new_progress_text != progress["text"]:
+            progress["text"] = new_progress_text
+            try:
+                await progress_message.edit_text(text=new_progress_text)
+            except Exception as e:
+                print(f"Ошибка при обновлении прогресса: {e}")
+
+    results = await fetch_many_queries(queries, total_per_query=COMPARE_VACANCIES_PER_QUERY, on_page=on_page)
+    if not any(results.values()):
+        raise Exception("Не удалось загрузить вакансии.")
+
+    await progress_message.edit_text(text="🔄 Данные загружены. Начинаем анализ...")
+
+    # NLP выполняется в отдельном потоке, чтобы не блокировать обработку других пользователей
+    comparison, unique_vacancies, deduplicator = await asyncio.to_thread(compare_vacancies, results)
+    results_text = (
+        f"📊 <b>Сравнение запросов</b>\n"
+        f"✅ <b>Уникальных вакансий:</b> {unique_vacancies}\n"
+        f"{format_duplicates_line(deduplicator)}"
+        f"В скобках — число вакансий по запросу, в ячейках — доля вакансий с навыком.\n\n"
+        f"<pre>{html.escape(format_comparison_output(comparison))}</pre>"
+    )
+
+    try:
+        await context.bot.delete_message(chat_id=chat_id, message_id=progress_message.message_id)
+    except Exception as e:
+        print(f"Ошибка при удалении сообщения о прогрессе: {e}")
+
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=results_text,
+        reply_markup=generate_back_button(),
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
 async def execute_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if context.user_data.get("is_processing", False):
+    # Блокировка общая для всех экземпляров бота
+    user_id = update.effective_user.id
+    lock_token = await acquire_user_lock(user_id)
+    if not lock_token:
         chat_id = update.message.chat_id if update.message else update.callback_query.message.chat_id
         await context.bot.send_message(
             chat_id=chat_id,
@@ -53,8 +152,6 @@ async def execute_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return ANALYZE_WAITING_FOR_QUERY
 
-    context.user_data["is_processing"] = True
-
     try:
         if update.message and update.message.text:
             query = update.message.text.strip()
@@ -76,8 +173,28 @@ async def execute_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return ANALYZE_WAITING_FOR_QUERY
 
+        # Режим сравнения включается кнопкой «Сравнить несколько запросов» и действует для введенного текста
+        if update.message and context.user_data.get("analyze_compare"):
+            queries = parse_compare_queries(query)
+            if len(queries) < 2:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text="Для сравнения введите хотя бы два запроса через запятую, например: python, go"
+                )
+                return ANALYZE_WAITING_FOR_QUERY
+
+            context.user_data.pop("analyze_compare", None)
+            await add_to_search_history(user_id, query)
+            if len(queries) > COMPARE_MAX_QUERIES:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=f"Можно сравнить не больше {COMPARE_MAX_QUERIES} запросов. "
+                         f"Не учтены: {', '.join(queries[COMPARE_MAX_QUERIES:])}"
+                )
+            await execute_comparison(context, chat_id, queries[:COMPARE_MAX_QUERIES])
+            return ANALYZE_WAITING_FOR_QUERY
+
         # Сохранение запроса в историю пользователя
-        user_id = update.effective_user.id
         await add_to_search_history(user_id, query)
 
         # Сообщение о начале прогресса
@@ -86,52 +203,47 @@ async def execute_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text="🔄 Прогресс загрузки: 0%"
         )
 
-        # Загрузка данных (vacancies)
-        total_vacancies_to_fetch = 2000
-        all_vacancies = []
-        per_page = 100
-        page = 0
+        # Загрузка данных (vacancies): широкие запросы делятся на части, чтобы обойти лимит HH в 2000 вакансий
+        fetch = PartitionedFetch(query)
+        deduplicator = VacancyDeduplicator()
+        skills_counter = Counter()
+        total_vacancies = 0
 
         current_progress_text = progress_message.text
-
-        while len(all_vacancies) < total_vacancies_to_fetch:
-            data = await fetch_vacancies(query=query, page=page, per_page=per_page)
-            if not data or "items" not in data:
-                break
-
-            all_vacancies.extend(data["items"])
-            progress_percent = min(int(len(all_vacancies) / total_vacancies_to_fetch * 100), 100)
-
-            new_progress_text = f"🔄 Прогресс загрузки: {progress_percent}%"
-            if current_progress_text != new_progress_text:
+        last_progress_update = time.monotonic()
+
+        # Вакансии анализируются порциями по мере загрузки, не дожидаясь окончания загрузки
+        async for batch in fetch.stream():
+            # NLP выполняется в отдельном потоке, чтобы не блокировать обработку других пользователей
+            batch_skills, batch_count = await asyncio.to_thread(process_vacancies, {"items": batch}, deduplicator)
+            skills_counter.update(dict(batch_skills))
+            total_vacancies += batch_count
+
+            progress_percent = min(int(fetch.loaded / fetch.expected * 100), 100)
+
+            new_progress_text = f"🔄 Прогресс загрузки и анализа: {progress_percent}%"
+            now = time.monotonic()
+            if current_progress_text != new_progress_text and now - last_progress_update >= PROGRESS_UPDATE_INTERVAL:
+                last_progress_update = now
+                # Прогресс — необязательная часть ответа: ошибка (например, RetryAfter) не прерывает анализ
                 try:
                     await progress_message.edit_text(text=new_progress_text)
                     current_progress_text = new_progress_text
                 except Exception as e:
-                    if "Message is not modified" in str(e):
-                        pass
-                    else:
-                        raise
-
-            if len(data["items"]) < per_page:
-                break
+                    print(f"Ошибка при обновлении прогресса: {e}")
 
-            page += 1
-
-        if not all_vacancies:
+        if not fetch.loaded:
             raise Exception("Не удалось загрузить вакансии.")
 
-        # Обновляем сообщение о прогрессе
-        await progress_message.edit_text(text="🔄 Данные загружены. Начинаем анализ...")
-
-        # Анализ вакансий
-        top_skills, total_vacancies = process_vacancies({"items": all_vacancies})
+        top_skills = skills_counter.most_common()
 
         if total_vacancies > 0 and top_skills:
             # Форматируем результаты анализа
             results = (
                 f"📊 <b>Результаты анализа</b>\n"
-                f"✅ <b>Проанализировано вакансий:</b> {total_vacancies}\n\n"
+                f"🔎 <b>Найдено по запросу:</b> {fetch.found}\n"
+                f"✅ <b>Проанализировано вакансий:</b> {total_vacancies}\n"
+                f"{format_duplicates_line(deduplicator)}\n"
                 f"<b>ТОП-10 навыков:</b>\n"
             )
             for i, (skill, count) in enumerate(top_skills[:10], 1):
@@ -158,6 +270,6 @@ async def execute_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await context.bot.send_message(chat_id=chat_id, text=f"Произошла ошибка: {e}")
 
     finally:
-        context.user_data["is_processing"] = False
+        await release_user_lock(user_id, lock_token)
 
     return ANALYZE_WAITING_FOR_QUERY
\ No newline at end of file
@@ -0,0 +1,63 @@
+import json
+
+from telegram import Update
+from telegram.ext import Application, ApplicationHandlerStop, ContextTypes
+
+from services.state_service import (
+    get_store,
+    partition_for,
+    partition_queue,
+    INSTANCE_INDEX,
+)
+
+
+def get_update_chat_id(update: Update) -> int:
+    """Возвращает ID чата (или пользователя), по которому разбиваются обновления."""
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return 0
+
+
+async def route_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Пересылает обновление экземпляру, который обслуживает этот чат.
+    Обновления своего раздела пропускает дальше к обычным обработчикам.
+    """
+    index = partition_for(get_update_chat_id(update))
+    if index == INSTANCE_INDEX:
+        return
+
+    await get_store().push(partition_queue(index), json.dumps(update.to_dict()))
+    raise ApplicationHandlerStop
+
+
+async def consume_partition(application: Application):
+    """
+    Забирает обновления своего раздела из общего хранилища и передает их в приложение.
+    """
+    store = get_store()
+    queue = partition_queue(INSTANCE_INDEX)
+
+    while True:
+        raw_update = await store.pop(queue, timeout=5)
+        if raw_update is None:
+            continue
+        try:
+            update = Update.de_json(json.loads(raw_update), application.bot)
+            await application.update_queue.put(update)
+        except Exception as e:
+            print(f"Ошибка при получении обновления из очереди: {e}")
+
+
+async def run_worker(application: Application):
+    """
+    Запускает экземпляр бота без опроса Telegram: обновления приходят только из очереди раздела.
+    """
+    async with application:
+        await application.start()
+        try:
+            await consume_partition(application)
+        finally:
+            await application.stop()
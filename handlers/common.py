@@ -49,6 +49,16 @@ async def handle_new_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
         state = SEARCH_WAITING_FOR_QUERY
     elif callback_data == "analyze_new_query":
         state = ANALYZE_WAITING_FOR_QUERY
+        context.user_data.pop("analyze_compare", None)
+    elif callback_data == "analyze_compare":
+        state = ANALYZE_WAITING_FOR_QUERY
+        # Следующий введенный текст разбивается на запросы для сравнения
+        context.user_data["analyze_compare"] = True
+        await context.bot.send_message(
+            chat_id=update.callback_query.message.chat_id,
+            text="Введите запросы для сравнения через запятую, например: python, go, java"
+        )
+        return state
     else:
         # Если коллбэк некорректный, возвращаем в главное меню
         await display_main_menu(update, context)
@@ -0,0 +1,54 @@
+import os
+
+from dotenv import load_dotenv
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import ContextTypes
+
+from handlers.search_handler import format_vacancy
+from services.inline_service import inline_search_cache
+
+# Загрузка переменных окружения
+load_dotenv()
+
+# Сколько секунд Telegram может кэшировать окончательный ответ
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", 300))
+
+
+def build_inline_result(item: dict) -> InlineQueryResultArticle:
+    """Формирует элемент inline-ответа для одной вакансии."""
+    employer = item.get("employer", {}).get("name", "Не указан")
+    city = item.get("area", {}).get("name", "Не указан")
+
+    return InlineQueryResultArticle(
+        id=str(item.get("id")),
+        title=item.get("name", "Не указано"),
+        description=f"{employer}, {city}",
+        url=item.get("alternate_url"),
+        input_message_content=InputTextMessageContent(
+            format_vacancy(item),
+            parse_mode="HTML",
+            disable_web_page_preview=True
+        ),
+    )
+
+
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обработчик inline-запросов (@bot python dev): возвращает вакансии по мере набора текста.
+    """
+    inline_query = update.inline_query
+    result = await inline_search_cache.lookup(inline_query.from_user.id, inline_query.query)
+
+    # Пользователь уже набрал новый текст, на этот запрос Telegram ответ не покажет
+    if result is None:
+        return
+
+    items, is_final = result
+    try:
+        await inline_query.answer(
+            [build_inline_result(item) for item in items],
+            # Запасной ответ кэшируем ненадолго, чтобы скоро получить полный результат
+            cache_time=INLINE_CACHE_TIME if is_final else 1,
+        )
+    except Exception as e:
+        print(f"Ошибка при ответе на inline-запрос: {e}")
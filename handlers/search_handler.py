@@ -6,7 +6,8 @@ from telegram.ext import ContextTypes
 
 from handlers.common import send_menu, generate_back_button
 from services.database_service import get_last_searches, add_to_search_history
-from services.search_service import fetch_vacancies
+from services.results_service import search_results
+from services.state_service import acquire_user_lock, release_user_lock
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -41,8 +42,75 @@ async def prompt_search_query(update: Update, context: ContextTypes.DEFAULT_TYPE
     return SEARCH_WAITING_FOR_QUERY
 
 
+def format_vacancy(item: dict) -> str:
+    """
+    Формирует текстовый блок одной вакансии.
+    :param item: Вакансия из ответа HH API.
+    :return: Текст в формате HTML.
+    """
+    name = item.get("name", "Не указано")  # Название вакансии
+    employer = item.get("employer", {}).get("name", "Не указан")  # Работодатель
+    city = item.get("area", {}).get("name", "Не указан")  # Город
+    salary = item.get("salary")  # Зарплата
+    url = item.get("alternate_url", "#")  # Ссылка на вакансию
+
+    # Форматируем зарплату
+    if salary:
+        if salary.get("from") and salary.get("to"):
+            salary = f"{salary['from']} - {salary['to']} {salary['currency']}"
+        elif salary.get("from"):
+            salary = f"от {salary['from']} {salary['currency']}"
+        elif salary.get("to"):
+            salary = f"до {salary['to']} {salary['currency']}"
+        else:
+            salary = "Не указана"
+    else:
+        salary = "Не указана"
+
+    return (
+        f"📝 <b>{name}</b>\n"
+        f"🏢 Работодатель: {employer}\n"
+        f"📍 Город: {city}\n"
+        f"💰 Зарплата: {salary}\n"
+        f"🔗 <a href='{url}'>Подробнее о вакансии</a>"
+    )
+
+
+def generate_pagination_buttons(token: str, page: int, page_count: int):
+    """
+    Генерация кнопок листания результатов и кнопки возврата в меню.
+    :param token: Идентификатор поиска, к которому относятся кнопки.
+    """
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("◀️ Предыдущая", callback_data=f"search_page_{token}_{page - 1}"))
+    if page + 1 < page_count:
+        navigation.append(InlineKeyboardButton("Следующая ▶️", callback_data=f"search_page_{token}_{page + 1}"))
+
+    buttons = [navigation] if navigation else []
+    buttons.append([InlineKeyboardButton("⬅️ Назад", callback_data="action_back")])
+    return InlineKeyboardMarkup(buttons)
+
+
+def format_results_page(items, token: str, page: int, page_count: int):
+    """
+    Формирует текст и кнопки одной страницы результатов поиска.
+    :return: (текст, разметка кнопок)
+    """
+    if not items:
+        return "По вашему запросу вакансий не найдено.", generate_back_button()
+
+    results_text = "\n\n".join(format_vacancy(item) for item in items)
+    if page_count > 1:
+        results_text += f"\n\n📄 Страница {page + 1} из {page_count}"
+    return results_text, generate_pagination_buttons(token, page, page_count)
+
+
 async def execute_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if context.user_data.get("is_processing", False):
+    # Блокировка общая для всех экземпляров бота
+    user_id = update.effective_user.id
+    lock_token = await acquire_user_lock(user_id)
+    if not lock_token:
         chat_id = update.message.chat_id if update.message else update.callback_query.message.chat_id
         await context.bot.send_message(
             chat_id=chat_id,
@@ -50,8 +118,6 @@ async def execute_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return SEARCH_WAITING_FOR_QUERY
 
-    context.user_data["is_processing"] = True  # Устанавливаем флаг выполнения
-
     try:
         if update.message and update.message.text:
             query = update.message.text.strip()
@@ -74,66 +140,64 @@ async def execute_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return SEARCH_WAITING_FOR_QUERY
 
         # Сохранение запроса в историю пользователя
-        user_id = update.effective_user.id
         await add_to_search_history(user_id, query)
 
-        # Запрашиваем вакансии
-        data = await fetch_vacancies(query=query, page=0, per_page=5)
-
-        if data and data.get("items"):
-            # Формируем красивый вывод вакансий
-            results = []
-            for item in data["items"]:
-                name = item.get("name", "Не указано")  # Название вакансии
-                employer = item.get("employer", {}).get("name", "Не указан")  # Работодатель
-                city = item.get("area", {}).get("name", "Не указан")  # Город
-                salary = item.get("salary")  # Зарплата
-                url = item.get("alternate_url", "#")  # Ссылка на вакансию
-
-                # Форматируем зарплату
-                if salary:
-                    if salary.get("from") and salary.get("to"):
-                        salary = f"{salary['from']} - {salary['to']} {salary['currency']}"
-                    elif salary.get("from"):
-                        salary = f"от {salary['from']} {salary['currency']}"
-                    elif salary.get("to"):
-                        salary = f"до {salary['to']} {salary['currency']}"
-                    else:
-                        salary = "Не указана"
-                else:
-                    salary = "Не указана"
-
-                # Формируем блок одной вакансии
-                vacancy_text = (
-                    f"📝 <b>{name}</b>\n"
-                    f"🏢 Работодатель: {employer}\n"
-                    f"📍 Город: {city}\n"
-                    f"💰 Зарплата: {salary}\n"
-                    f"🔗 <a href='{url}'>Подробнее о вакансии</a>"
-                )
-                results.append(vacancy_text)
-
-            # Объединяем вакансии в единый текст
-            results_text = "\n\n".join(results)
-        else:
-            results_text = "По вашему запросу вакансий не найдено."
+        # Запрашиваем первую порцию вакансий, дальше страницы листаются из буфера
+        token = search_results.start(chat_id, query).token
+        items, page_count = await search_results.get_page(chat_id, page=0, token=token)
+        results_text, reply_markup = format_results_page(items, token, 0, page_count)
 
         # Отправляем результат
         await context.bot.send_message(
             chat_id=chat_id,
             text=results_text,
-            reply_markup=generate_back_button(),
+            reply_markup=reply_markup,
             parse_mode="HTML",  # Указываем HTML для форматирования
             disable_web_page_preview=True  # Отключаем превью ссылок
         )
 
+        # Пока пользователь читает первую страницу, подгружаем следующую
+        if page_count > 1:
+            context.application.create_task(search_results.prefetch(chat_id, page=1, token=token))
+
     except Exception as e:
         await context.bot.send_message(chat_id=chat_id, text=f"Произошла ошибка: {e}")
 
     finally:
-        context.user_data["is_processing"] = False
+        await release_user_lock(user_id, lock_token)
 
     return SEARCH_WAITING_FOR_QUERY
 
 
+async def show_search_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обработчик кнопок листания результатов поиска.
+    Страницы берутся из буфера чата, следующая страница подгружается в фоне.
+    """
+    query = update.callback_query
+    token, _, page = query.data.removeprefix("search_page_").rpartition("_")
+    page = int(page)
+    chat_id = query.message.chat_id
+    await query.answer()
+
+    # Если в чате уже выполнен другой поиск, кнопки этого сообщения больше не действуют
+    items, page_count = await search_results.get_page(chat_id, page=page, token=token)
+    if items is None:
+        await query.edit_message_text(
+            "Результаты поиска устарели. Выполните поиск заново.",
+            reply_markup=generate_back_button()
+        )
+        return SEARCH_WAITING_FOR_QUERY
 
+    results_text, reply_markup = format_results_page(items, token, page, page_count)
+    await query.edit_message_text(
+        results_text,
+        reply_markup=reply_markup,
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+    if page + 1 < page_count:
+        context.application.create_task(search_results.prefetch(chat_id, page=page + 1, token=token))
+
+    return SEARCH_WAITING_FOR_QUERY
@@ -0,0 +1,79 @@
+import html
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from handlers.search_handler import format_vacancy
+from services.database_service import add_subscription, remove_subscription, get_chat_subscriptions
+from services.search_service import normalize_query
+from services.subscription_service import RateLimitedSender, run_subscription_poller
+
+# Сколько вакансий показывать в одном уведомлении
+NOTIFY_MAX_VACANCIES = 5
+
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /subscribe <запрос>: подписывает чат на новые вакансии."""
+    query = " ".join(context.args).strip()
+    if not query:
+        await update.message.reply_text("Укажите запрос: /subscribe python developer")
+        return
+
+    created = await add_subscription(
+        update.effective_user.id, update.effective_chat.id, query, normalize_query(query)
+    )
+    if created:
+        await update.message.reply_text(f"🔔 Подписка оформлена. Новые вакансии по запросу «{query}» будут приходить сюда.")
+    else:
+        await update.message.reply_text(f"Подписка на «{query}» уже есть или не может быть сохранена.")
+
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /unsubscribe <запрос>: отменяет подписку."""
+    query = " ".join(context.args).strip()
+    if not query:
+        await update.message.reply_text("Укажите запрос: /unsubscribe python developer")
+        return
+
+    if await remove_subscription(update.effective_chat.id, normalize_query(query)):
+        await update.message.reply_text(f"Подписка на «{query}» отменена.")
+    else:
+        await update.message.reply_text(f"Подписка на «{query}» не найдена.")
+
+
+async def subscriptions_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /subscriptions: показывает подписки чата."""
+    subscriptions = await get_chat_subscriptions(update.effective_chat.id)
+    if not subscriptions:
+        await update.message.reply_text("Подписок нет. Оформите подписку: /subscribe python developer")
+        return
+
+    lines = ["🔔 Ваши подписки:"] + [f"• {query}" for query in subscriptions]
+    await update.message.reply_text("\n".join(lines))
+
+
+def format_notification(query: str, vacancies: list) -> str:
+    """Формирует уведомление о новых вакансиях по подписке."""
+    text = f"🔔 <b>Новые вакансии по запросу «{html.escape(query)}»</b>\n\n"
+    text += "\n\n".join(format_vacancy(item) for item in vacancies[:NOTIFY_MAX_VACANCIES])
+    if len(vacancies) > NOTIFY_MAX_VACANCIES:
+        text += f"\n\n…и еще {len(vacancies) - NOTIFY_MAX_VACANCIES}"
+    return text
+
+
+def subscription_jobs(application: Application) -> list:
+    """
+    Фоновые задачи подписок: отправка уведомлений и периодическая проверка новых вакансий.
+    :return: Список корутин для запуска.
+    """
+    sender = RateLimitedSender(application.bot)
+
+    async def notify(chat_id: int, query: str, vacancies: list):
+        await sender.send(
+            chat_id,
+            format_notification(query, vacancies),
+            parse_mode="HTML",
+            disable_web_page_preview=True
+        )
+
+    return [sender.run(), run_subscription_poller(notify)]
@@ -0,0 +1,256 @@
+"""
+Нагрузочный тест бота: N виртуальных пользователей проходят сценарий
+старт → поиск → листание → назад → анализ (из истории) → назад
+через настоящие обработчики из bot.py. Telegram Bot API и HH подменяются
+локальными серверами, поэтому тест работает без сети.
+
+Запуск:
+    python -m loadtest --users 50 --hh-latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import time
+
+from telegram import Update
+
+from loadtest.fake_servers import FakeHHApi, FakeTelegramApi
+
+FAKE_TOKEN = "123456:LOAD-TEST"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест Telegram-бота без сети.")
+    parser.add_argument("--users", type=int, default=20, help="Количество виртуальных пользователей")
+    parser.add_argument("--rounds", type=int, default=1, help="Сколько раз каждый пользователь проходит сценарий")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Пауза пользователя между действиями (сек.)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="За сколько секунд подключаются все пользователи")
+    parser.add_argument("--hh-latency", type=float, default=0.1, help="Задержка ответа HH (сек.)")
+    parser.add_argument("--hh-jitter", type=float, default=0.05, help="Случайная добавка к задержке HH (сек.)")
+    parser.add_argument("--hh-found", type=int, default=2000, help="Сколько вакансий HH «находит» по запросу")
+    parser.add_argument("--tg-latency", type=float, default=0.02, help="Задержка ответа Telegram Bot API (сек.)")
+    parser.add_argument("--concurrent-updates", type=int, default=1,
+                        help="Сколько обновлений обрабатывается одновременно (1 — как у бота по умолчанию)")
+    parser.add_argument("--verbose", action="store_true", help="Не скрывать вывод бота")
+    return parser.parse_args()
+
+
+def percentile(values, percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class UpdateFactory:
+    """Собирает JSON синтетических обновлений Telegram для одного пользователя."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._update_id = user_id * 1000
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+        self.chat = {"id": user_id, "type": "private"}
+
+    def _next_id(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def message(self, text: str) -> dict:
+        message = {
+            "message_id": self._next_id(),
+            "date": int(time.time()),
+            "chat": self.chat,
+            "from": self.user,
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": self._update_id, "message": message}
+
+    def callback(self, data: str) -> dict:
+        update_id = self._next_id()
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self.user,
+                "chat_instance": str(self.user_id),
+                "data": data,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "chat": self.chat,
+                    "from": {"id": 1, "is_bot": True, "first_name": "LoadTest"},
+                    "text": "menu",
+                },
+            },
+        }
+
+
+def next_page_callback(factory: UpdateFactory) -> dict:
+    """Нажатие «Следующая» под результатами последнего поиска пользователя."""
+    # Буфер результатов импортируется после настройки окружения в main()
+    from services.results_service import search_results
+
+    results = search_results.get(factory.chat["id"])
+    return factory.callback(f"search_page_{results.token if results else ''}_1")
+
+
+def scenario(factory: UpdateFactory, query: str):
+    """
+    Шаги сценария: (название шага, JSON обновления).
+    Обновления, зависящие от ответа бота, задаются функциями и собираются перед отправкой.
+    """
+    return [
+        ("start", factory.message("/start")),
+        ("search_menu", factory.callback("action_search")),
+        ("search", factory.message(query)),
+        ("search_next_page", lambda: next_page_callback(factory)),
+        ("back", factory.callback("action_back")),
+        ("analyze_menu", factory.callback("action_analyze")),
+        ("analyze_history", factory.callback(f"analyze_query_{query}")),
+        ("back", factory.callback("action_back")),
+    ]
+
+
+class LoadTest:
+    """Прогоняет сценарии виртуальных пользователей и собирает метрики."""
+
+    def __init__(self, application, args):
+        self.application = application
+        self.args = args
+        # Шаг сценария -> список замеров (ожидание очереди, обработка) в секундах
+        self.samples = {}
+        self.errors = 0
+        self.loop_lag = []
+        # Как и в PTB, не больше concurrent_updates обновлений обрабатываются одновременно
+        self.slots = asyncio.Semaphore(args.concurrent_updates)
+        application.add_error_handler(self.on_error)
+
+    async def on_error(self, update, context):
+        self.errors += 1
+        print(f"Ошибка обработчика: {context.error}")
+
+    async def send(self, step: str, data: dict):
+        update = Update.de_json(data, self.application.bot)
+        queued = time.perf_counter()
+        async with self.slots:
+            # Обработку замеряем отдельно от ожидания свободного слота
+            started = time.perf_counter()
+            await self.application.process_update(update)
+            finished = time.perf_counter()
+        self.samples.setdefault(step, []).append((started - queued, finished - started))
+
+    async def virtual_user(self, index: int):
+        await asyncio.sleep(self.args.ramp_up * index / max(self.args.users, 1))
+        factory = UpdateFactory(user_id=100000 + index)
+        query = ("python", "go", "java", "devops")[index % 4]
+
+        for _ in range(self.args.rounds):
+            for step, data in scenario(factory, query):
+                await self.send(step, data() if callable(data) else data)
+                await asyncio.sleep(self.args.think_time)
+
+    async def monitor_loop(self, interval: float = 0.01):
+        """Измеряет задержку цикла событий: насколько позже запланированного просыпается задача."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(max(time.perf_counter() - started - interval, 0.0))
+
+    async def run(self) -> float:
+        monitor = asyncio.ensure_future(self.monitor_loop())
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(self.virtual_user(i) for i in range(self.args.users)))
+        finally:
+            monitor.cancel()
+        return time.perf_counter() - started
+
+
+def format_percentiles(values, percents=(50, 95, 99)) -> str:
+    """Перцентили и максимум в миллисекундах, выровненные по колонкам."""
+    columns = [percentile(values, percent) for percent in percents] + [max(values)]
+    return "".join(f"{value * 1000:>9.1f}" for value in columns)
+
+
+def print_report(test: LoadTest, elapsed: float, telegram: FakeTelegramApi, hh: FakeHHApi):
+    all_samples = [sample for samples in test.samples.values() for sample in samples]
+
+    print("\n📊 Результаты нагрузочного теста")
+    print(f"Пользователей: {test.args.users}, обновлений: {len(all_samples)}, ошибок: {test.errors}")
+    print(f"Время прогона: {elapsed:.1f} с, пропускная способность: {len(all_samples) / elapsed:.1f} обновл./с")
+    print(f"Запросов к HH: {hh.requests}, вызовов Bot API: {telegram.requests}")
+
+    # Обработка — время работы обработчиков; ожидание — очередь на свободный слот
+    # (--concurrent-updates); итого — задержка ответа, которую видит пользователь
+    print("\nЗадержка, мс:")
+    header = "".join(f"{name:>9}" for name in ("p50", "p95", "p99", "max"))
+    print(f"{'':<24}{'обработка':^36}{'ожидание':^36}{'итого':^36}")
+    print(f"{'шаг':<18}{'n':>6}{header}{header}{header}")
+    for step, samples in list(test.samples.items()) + [("всего", all_samples)]:
+        waits = [wait for wait, _ in samples]
+        handling = [handled for _, handled in samples]
+        totals = [wait + handled for wait, handled in samples]
+        print(
+            f"{step:<18}{len(samples):>6}"
+            f"{format_percentiles(handling)}{format_percentiles(waits)}{format_percentiles(totals)}"
+        )
+
+    if test.loop_lag:
+        print("\nЗадержка цикла событий, мс:")
+        print(
+            f"среднее {statistics.mean(test.loop_lag) * 1000:.1f}, "
+            f"p50 {percentile(test.loop_lag, 50) * 1000:.1f}, "
+            f"p95 {percentile(test.loop_lag, 95) * 1000:.1f}, "
+            f"p99 {percentile(test.loop_lag, 99) * 1000:.1f}, "
+            f"max {max(test.loop_lag) * 1000:.1f}"
+        )
+
+
+async def main():
+    args = parse_args()
+
+    telegram = FakeTelegramApi(latency=args.tg_latency)
+    hh = FakeHHApi(latency=args.hh_latency, jitter=args.hh_jitter, found=args.hh_found)
+    await telegram.start()
+    await hh.start()
+
+    # Переменные окружения читаются модулями бота при импорте, поэтому задаем их до импорта bot
+    os.environ["BOT_TOKEN"] = FAKE_TOKEN
+    os.environ["HH_API_URL"] = f"{hh.url}/vacancies"
+    os.environ["STATE_BACKEND"] = "memory"
+    os.environ["INSTANCE_COUNT"] = "1"
+    os.environ["INSTANCE_INDEX"] = "0"
+    # База данных недоступна: история запросов просто остается пустой
+    os.environ["DB_HOST"] = "127.0.0.1"
+    os.environ["DB_PORT"] = "1"
+    os.environ.setdefault("SEARCH_WAITING_FOR_QUERY", "0")
+    os.environ.setdefault("ANALYZE_WAITING_FOR_QUERY", "1")
+
+    from bot import build_application
+
+    application = build_application(token=FAKE_TOKEN, base_url=f"{telegram.url}/bot")
+    test = LoadTest(application, args)
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        async with application:
+            await application.start()
+            with output:
+                elapsed = await test.run()
+            await application.stop()
+    finally:
+        await telegram.stop()
+        await hh.stop()
+
+    print_report(test, elapsed, telegram, hh)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,176 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+# Навыки, из которых собираются описания синтетических вакансий
+FAKE_SKILLS = [
+    "python", "django", "fastapi", "sql", "postgresql", "docker", "kubernetes",
+    "git", "linux", "redis", "go", "java", "spring", "react", "typescript",
+]
+
+# Сколько дочерних регионов у «России» в заглушке HH
+FAKE_REGIONS = 10
+# За сколько последних дней равномерно опубликованы вакансии заглушки HH
+FAKE_HISTORY_DAYS = 60
+
+
+class FakeServer:
+    """Базовый локальный HTTP-сервер с настраиваемой задержкой ответа."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self.app = web.Application()
+        self._runner = None
+        self.url = None
+
+    async def delay(self):
+        self.requests += 1
+        pause = self.latency + random.uniform(0, self.jitter)
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class FakeTelegramApi(FakeServer):
+    """
+    Заглушка Telegram Bot API: отвечает на методы, которые вызывает бот,
+    и считает отправленные сообщения.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        super().__init__(latency, jitter)
+        self._message_id = 0
+        self.calls = {}
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    def next_message(self, params: dict) -> dict:
+        self._message_id += 1
+        chat_id = int(params.get("chat_id") or 0)
+        return {
+            "message_id": int(params.get("message_id") or self._message_id),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params.get("text", ""),
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        await self.delay()
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "LoadTest", "username": "load_test_bot"}
+        elif method in ("sendMessage", "editMessageText"):
+            result = self.next_message(params)
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+
+class FakeHHApi(FakeServer):
+    """
+    Заглушка API HeadHunter: генерирует детерминированные вакансии для любого запроса.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, found: int = 2000):
+        super().__init__(latency, jitter)
+        self.found = found
+        self.app.router.add_get("/vacancies", self.search)
+        self.app.router.add_get("/vacancies/{vacancy_id}", self.details)
+        self.app.router.add_get("/areas/{area_id}", self.areas)
+
+    def partition_found(self, request: web.Request) -> int:
+        """
+        Сколько вакансий «находится» с учетом фильтров: регион делит выдачу на FAKE_REGIONS частей,
+        интервал дат — пропорционально своей доле от FAKE_HISTORY_DAYS дней.
+        """
+        found = self.found
+        if request.query.get("area", "113") != "113":
+            found //= FAKE_REGIONS
+        if "date_from" in request.query or "date_to" in request.query:
+            now = datetime.now()
+            oldest = now - timedelta(days=FAKE_HISTORY_DAYS)
+            date_from = max(datetime.fromisoformat(request.query.get("date_from", oldest.isoformat())), oldest)
+            date_to = min(datetime.fromisoformat(request.query.get("date_to", now.isoformat())), now)
+            found = max(int(found * (date_to - date_from) / timedelta(days=FAKE_HISTORY_DAYS)), 0)
+        return found
+
+    @staticmethod
+    def make_vacancy(query: str, vacancy_id: int) -> dict:
+        rng = random.Random(f"{query}:{vacancy_id}")
+        skills = rng.sample(FAKE_SKILLS, 4)
+        return {
+            "id": str(vacancy_id),
+            "name": f"{query.title()} Developer #{vacancy_id}",
+            "employer": {"name": f"Company {vacancy_id % 97}"},
+            "area": {"name": "Москва"},
+            "salary": {"from": 100000 + vacancy_id % 50 * 1000, "to": None, "currency": "RUR"},
+            "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+            "published_at": "2024-01-01T00:00:00+0300",
+            "snippet": {
+                "requirement": f"Опыт работы с {skills[0]}, {skills[1]} и {skills[2]}.",
+                "responsibility": f"Разработка сервисов, поддержка {skills[3]}.",
+            },
+        }
+
+    async def search(self, request: web.Request) -> web.Response:
+        await self.delay()
+        query = request.query.get("text", "")
+        page = int(request.query.get("page", 0))
+        per_page = int(request.query.get("per_page", 20))
+        found = self.partition_found(request)
+
+        # Как и настоящий HH, отдаем не больше 2000 вакансий на запрос
+        available = min(found, 2000)
+        start = page * per_page
+        # Вакансии разных частей запроса (регион, даты) не пересекаются
+        offset = 0
+        if request.query.get("area", "113") != "113" or "date_from" in request.query or "date_to" in request.query:
+            key = (request.query.get("area"), request.query.get("date_from"), request.query.get("date_to"))
+            offset = hash(key) % 10 ** 9 * 10 ** 4
+        items = [
+            self.make_vacancy(query, offset + i)
+            for i in range(start, min(start + per_page, available))
+        ]
+        pages = (available + per_page - 1) // per_page
+
+        return web.json_response({
+            "items": items,
+            "found": found,
+            "pages": pages,
+            "page": page,
+            "per_page": per_page,
+        })
+
+    async def details(self, request: web.Request) -> web.Response:
+        await self.delay()
+        vacancy_id = int(request.match_info["vacancy_id"])
+        return web.json_response(self.make_vacancy("vacancy", vacancy_id))
+
+    async def areas(self, request: web.Request) -> web.Response:
+        await self.delay()
+        area_id = request.match_info["area_id"]
+        children = [{"id": str(i), "areas": []} for i in range(1, FAKE_REGIONS + 1)] if area_id == "113" else []
+        return web.json_response({"id": area_id, "areas": children})
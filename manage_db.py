@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import time
+
+from services.database_service import get_connection
+from services.schema_service import (
+    SEARCH_HISTORY_RETENTION_MONTHS,
+    apply_schema,
+    describe_partitions,
+    drop_old_partitions,
+    ensure_partitions,
+    rollup_search_history,
+    seed_search_history,
+    verify_rollup,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Управление схемой базы данных бота.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="Создать или обновить схему (в том числе перенести старую search_history)")
+
+    maintain = commands.add_parser("maintain", help="Партиции на будущее, дневные сводки и удаление старых партиций")
+    maintain.add_argument("--retention-months", type=int, default=SEARCH_HISTORY_RETENTION_MONTHS,
+                          help="Сколько месяцев хранить сырую историю")
+
+    seed = commands.add_parser("seed", help="Заполнить историю синтетическими данными")
+    seed.add_argument("--rows", type=int, default=1_000_000, help="Количество строк")
+    seed.add_argument("--months", type=int, default=18, help="За сколько последних месяцев распределить строки")
+    seed.add_argument("--users", type=int, default=10000, help="Количество разных пользователей")
+
+    commands.add_parser("verify", help="Сверить дневные сводки с сырыми данными и показать партиции")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+
+    connection = await get_connection()
+    if not connection:
+        raise SystemExit("Не удалось подключиться к базе данных. Проверьте параметры DB_* в .env.")
+
+    try:
+        started = time.perf_counter()
+
+        if args.command == "migrate":
+            await apply_schema(connection)
+            print("Схема базы данных создана.")
+
+        elif args.command == "maintain":
+            await ensure_partitions(connection)
+            updated = await rollup_search_history(connection)
+            dropped = await drop_old_partitions(connection, args.retention_months)
+            print(f"Обновлено строк сводки: {updated}")
+            print(f"Удалено партиций: {', '.join(dropped) if dropped else 'нет'}")
+
+        elif args.command == "seed":
+            await seed_search_history(connection, args.rows, args.months, args.users)
+            print(f"Добавлено синтетических строк: {args.rows}")
+
+        elif args.command == "verify":
+            for name, count in await describe_partitions(connection):
+                print(f"{name:<28}{count:>12}")
+            mismatches = await verify_rollup(connection)
+            if mismatches:
+                print(f"Расхождений в дневных сводках: {len(mismatches)}")
+                for day, query, rolled_up, searches in mismatches[:10]:
+                    print(f"  {day} «{query}»: в сводке {rolled_up}, в истории {searches}")
+            else:
+                print("Дневные сводки совпадают с историей запросов.")
+
+        print(f"Готово за {time.perf_counter() - started:.1f} с")
+    finally:
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
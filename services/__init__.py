@@ -1,7 +1,11 @@
 from services.analyze_service import (
     extract_skills_with_spacy,
+    extract_vacancy_skills,
     process_vacancies,
-    format_skills_output
+    format_skills_output,
+    compare_vacancies,
+    format_comparison_output,
 )
-from services.search_service import fetch_vacancies, fetch_vacancy_details
+from services.search_service import fetch_vacancies, fetch_vacancy_details, fetch_many_queries
 from services.database_service import add_to_search_history, get_last_searches
+from services.dedup_service import VacancyDeduplicator
@@ -1,6 +1,8 @@
 import spacy
 from collections import Counter
 
+from services.dedup_service import VacancyDeduplicator
+
 # Загружаем English NLP модель spaCy
 nlp = spacy.load("en_core_web_sm")
 
@@ -94,10 +96,25 @@ def extract_skills_with_spacy(text: str) -> list:
     return list(set(found_skills))
 
 
-def process_vacancies(data: dict):
+def extract_vacancy_skills(item: dict) -> list:
+    """
+    Извлекает навыки из требований и обязанностей одной вакансии.
+    :param item: Вакансия из ответа HH API.
+    :return: Список найденных навыков.
+    """
+    snippet = item.get('snippet') or {}
+    requirement = snippet.get('requirement') or ''
+    responsibility = snippet.get('responsibility') or ''
+
+    # Консолидируем текст
+    return extract_skills_with_spacy(f"{requirement} {responsibility}")
+
+
+def process_vacancies(data: dict, deduplicator: VacancyDeduplicator = None):
     """
     Анализирует вакансии на основе NLP методов.
     :param data: JSON-объект со списком вакансий.
+    :param deduplicator: Дедупликатор повторов; если не передан, создается новый для этого вызова.
     :return: ТОП-10 навыков и общее число обработанных вакансий.
     """
     all_skills = []
@@ -106,17 +123,15 @@ def process_vacancies(data: dict):
     if "items" not in data:
         return [], 0
 
-    for item in data["items"]:
-        try:
-            snippet = item.get('snippet', {})
-            requirement = snippet.get('requirement', '')
-            responsibility = snippet.get('responsibility', '')
-
-            # Консолидируем текст
-            text = f"{requirement} {responsibility}"
+    # Повторы (репосты агентств, одна вакансия в нескольких городах) отсеиваем до NLP
+    if deduplicator is None:
+        deduplicator = VacancyDeduplicator()
+    items = deduplicator.add(data["items"])
 
+    for item in items:
+        try:
             # Извлечение навыков через spaCy
-            skills = extract_skills_with_spacy(text)
+            skills = extract_vacancy_skills(item)
             if skills:
                 all_skills.extend(skills)
 
@@ -142,3 +157,62 @@ def format_skills_output(top_skills, total_vacancies):
 
     return "\n".join(output)
 
+
+def compare_vacancies(results: dict):
+    """
+    Сравнивает навыки по нескольким запросам.
+    Вакансия, найденная по нескольким запросам, анализируется только один раз,
+    а повторы одной вакансии (в том числе почти одинаковые) считаются за одну.
+    :param results: Словарь {запрос: список вакансий}.
+    :return: Словарь {запрос: (Counter навыков, число вакансий)}, число уникальных вакансий
+             и дедупликатор со статистикой схлопнутых повторов.
+    """
+    deduplicator = VacancyDeduplicator()
+    skills_by_id = {}
+    for items in results.values():
+        for item in deduplicator.add(items):
+            try:
+                skills_by_id[item.get("id")] = extract_vacancy_skills(item)
+            except Exception as e:
+                print(f"Ошибка при обработке одной из вакансий: {e}")
+                skills_by_id[item.get("id")] = []
+
+    comparison = {}
+    for query, items in results.items():
+        vacancy_ids = {deduplicator.representative_of(item) for item in items}
+        skills_counter = Counter()
+        for vacancy_id in vacancy_ids:
+            skills_counter.update(skills_by_id[vacancy_id])
+        comparison[query] = (skills_counter, len(vacancy_ids))
+
+    return comparison, len(skills_by_id), deduplicator
+
+
+def format_comparison_output(comparison: dict, top_n: int = 10) -> str:
+    """
+    Формирует таблицу навыков «бок о бок» для нескольких запросов.
+    В ячейках — доля вакансий запроса, в которых упоминается навык.
+    :param comparison: Результат compare_vacancies.
+    :param top_n: Сколько навыков показать.
+    """
+    total_counter = Counter()
+    for skills_counter, _ in comparison.values():
+        total_counter.update(skills_counter)
+
+    queries = list(comparison)
+    skill_width = max([len(skill) for skill, _ in total_counter.most_common(top_n)] + [5])
+    column_width = max([len(query) for query in queries] + [5]) + 2
+
+    lines = [
+        "Навык".ljust(skill_width) + "".join(query.rjust(column_width) for query in queries),
+        "".ljust(skill_width) + "".join(f"({comparison[query][1]})".rjust(column_width) for query in queries),
+    ]
+    for skill, _ in total_counter.most_common(top_n):
+        row = skill.capitalize().ljust(skill_width)
+        for query in queries:
+            skills_counter, vacancies_count = comparison[query]
+            share = skills_counter[skill] / vacancies_count * 100 if vacancies_count else 0
+            row += f"{share:.0f}%".rjust(column_width)
+        lines.append(row)
+
+    return "\n".join(lines)
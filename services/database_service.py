@@ -90,3 +90,159 @@ async def add_to_search_history(user_id, search_query):
     finally:
         # Закрываем соединение асинхронно
         await connection.close()
+
+
+async def add_subscription(user_id, chat_id, search_query, normalized_query):
+    """
+    Подписывает чат на новые вакансии по запросу.
+
+    :param user_id: ID пользователя
+    :param chat_id: ID чата, в который приходят уведомления
+    :param search_query: текст поискового запроса
+    :param normalized_query: нормализованный запрос, по которому объединяются подписки
+    :return: True, если подписка создана, False, если она уже была или произошла ошибка
+    """
+    query = """
+    INSERT INTO subscriptions (user_id, chat_id, search_query, normalized_query, created_at)
+    VALUES ($1, $2, $3, $4, NOW())
+    ON CONFLICT (chat_id, normalized_query) DO NOTHING;
+    """
+    # Новые вакансии ищутся с момента подписки; если у запроса уже есть подписчики, их отсчет не сбрасываем
+    state_query = """
+    INSERT INTO subscription_queries (normalized_query, last_checked)
+    VALUES ($1, NOW())
+    ON CONFLICT (normalized_query) DO UPDATE SET last_checked = NOW()
+    WHERE NOT EXISTS (SELECT 1 FROM subscriptions WHERE subscriptions.normalized_query = $1);
+    """
+
+    connection = await get_connection()
+    if not connection:
+        return False
+
+    try:
+        async with connection.transaction():
+            await connection.execute(state_query, normalized_query)
+            status = await connection.execute(query, user_id, chat_id, search_query, normalized_query)
+        return status.endswith(" 1")
+    except Exception as e:
+        print(f"Ошибка при добавлении подписки: {e}")
+        return False
+    finally:
+        await connection.close()
+
+
+async def remove_subscription(chat_id, normalized_query):
+    """
+    Отменяет подписку чата на запрос.
+
+    :param chat_id: ID чата
+    :param normalized_query: нормализованный запрос
+    :return: True, если подписка была удалена
+    """
+    query = """
+    DELETE FROM subscriptions
+    WHERE chat_id = $1 AND normalized_query = $2;
+    """
+
+    connection = await get_connection()
+    if not connection:
+        return False
+
+    try:
+        status = await connection.execute(query, chat_id, normalized_query)
+        return status != "DELETE 0"
+    except Exception as e:
+        print(f"Ошибка при удалении подписки: {e}")
+        return False
+    finally:
+        await connection.close()
+
+
+async def get_chat_subscriptions(chat_id):
+    """
+    Возвращает запросы, на которые подписан чат.
+
+    :param chat_id: ID чата
+    :return: Список строк с запросами
+    """
+    query = """
+    SELECT search_query
+    FROM subscriptions
+    WHERE chat_id = $1
+    ORDER BY created_at;
+    """
+
+    connection = await get_connection()
+    if not connection:
+        return []
+
+    try:
+        rows = await connection.fetch(query, chat_id)
+        return [row['search_query'] for row in rows]
+    except Exception as e:
+        print(f"Ошибка при извлечении подписок: {e}")
+        return []
+    finally:
+        await connection.close()
+
+
+async def get_subscribed_queries():
+    """
+    Возвращает все запросы с подписками, объединенные по нормализованному тексту.
+
+    :return: Словарь {нормализованный запрос: {"query", "chat_ids", "last_checked"}}
+    """
+    query = """
+    SELECT s.normalized_query,
+           MIN(s.search_query) AS search_query,
+           ARRAY_AGG(DISTINCT s.chat_id) AS chat_ids,
+           q.last_checked
+    FROM subscriptions s
+    JOIN subscription_queries q USING (normalized_query)
+    GROUP BY s.normalized_query, q.last_checked;
+    """
+
+    connection = await get_connection()
+    if not connection:
+        return {}
+
+    try:
+        rows = await connection.fetch(query)
+        return {
+            row['normalized_query']: {
+                "query": row['search_query'],
+                "chat_ids": list(row['chat_ids']),
+                "last_checked": row['last_checked'],
+            }
+            for row in rows
+        }
+    except Exception as e:
+        print(f"Ошибка при извлечении подписок: {e}")
+        return {}
+    finally:
+        await connection.close()
+
+
+async def update_subscription_checked(normalized_query, checked_at):
+    """
+    Запоминает момент последней проверки запроса, с которого начнется следующая.
+
+    :param normalized_query: нормализованный запрос
+    :param checked_at: время проверки
+    """
+    query = """
+    UPDATE subscription_queries
+    SET last_checked = $2
+    WHERE normalized_query = $1;
+    """
+
+    connection = await get_connection()
+    if not connection:
+        return
+
+    try:
+        await connection.execute(query, normalized_query, checked_at)
+    except Exception as e:
+        print(f"Ошибка при обновлении времени проверки подписки: {e}")
+    finally:
+        await connection.close()
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# Порог сходства (коэффициент Жаккара), начиная с которого вакансии считаются дубликатами.
+# 0 — схлопывать только точные совпадения текста
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))
+# Количество хеш-функций MinHash: больше — точнее оценка сходства, но дольше расчет
+MINHASH_PERMUTATIONS = 64
+# Длина символьных шинглов
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_vacancy_text(item: dict) -> str:
+    """
+    Приводит требования и обязанности вакансии к единому виду для сравнения:
+    без HTML-разметки подсветки, знаков препинания и лишних пробелов.
+    """
+    snippet = item.get('snippet') or {}
+    text = f"{snippet.get('requirement') or ''} {snippet.get('responsibility') or ''}".lower()
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"[^\w+#]+", " ", text)
+    return " ".join(text.split())
+
+
+def _choose_bands(num_perm: int, threshold: float):
+    """
+    Подбирает разбиение подписи на полосы LSH так, чтобы порог срабатывания (1/b)^(1/r)
+    был ближе всего к заданному порогу сходства.
+    :return: (количество полос, строк в полосе)
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+class VacancyDeduplicator:
+    """
+    Отсеивает повторы вакансий перед извлечением навыков.
+    Точные повторы находятся по хешу нормализованного текста, похожие — через MinHash и LSH.
+    Состояние сохраняется между вызовами, поэтому вакансии можно подавать порциями.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = MINHASH_PERMUTATIONS):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _choose_bands(num_perm, threshold) if threshold > 0 else (0, 0)
+
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self._exact = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+        # ID вакансии -> ID вакансии, которая ее представляет (для уникальных — сама вакансия)
+        self.representatives = {}
+
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    @property
+    def collapsed(self) -> int:
+        """Сколько вакансий схлопнуто всего."""
+        return self.exact_duplicates + self.near_duplicates
+
+    def _signature(self, text: str) -> np.ndarray:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+        hashes = np.array([zlib.crc32(shingle.encode()) for shingle in shingles], dtype=np.uint64)
+        hashes %= _MERSENNE_PRIME
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def _find_near_duplicate(self, vacancy_id, signature: np.ndarray):
+        """Ищет ранее добавленную похожую вакансию и регистрирует новую в полосах LSH."""
+        bands = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+        candidates = set()
+        for bucket, key in zip(self._buckets, bands):
+            candidates.update(bucket.get(key, ()))
+        for candidate in candidates:
+            # Доля совпавших минимальных хешей — оценка коэффициента Жаккара
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                return candidate
+
+        self._signatures[vacancy_id] = signature
+        for bucket, key in zip(self._buckets, bands):
+            bucket.setdefault(key, []).append(vacancy_id)
+        return None
+
+    def add(self, items: list) -> list:
+        """
+        Добавляет вакансии и возвращает только те, что не повторяют уже добавленные.
+        :param items: Список вакансий из ответа HH API.
+        :return: Список уникальных вакансий.
+        """
+        unique_items = []
+        for item in items:
+            vacancy_id = item.get("id")
+            # Ту же самую вакансию (например, найденную по двум запросам) дубликатом не считаем
+            if vacancy_id in self.representatives:
+                continue
+            text = normalize_vacancy_text(item)
+
+            # Без требований и обязанностей сравнивать нечего: такие вакансии считаем уникальными
+            if not text:
+                self.representatives[vacancy_id] = vacancy_id
+                unique_items.append(item)
+                continue
+
+            digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+            if digest in self._exact:
+                self.representatives[vacancy_id] = self.representatives[self._exact[digest]]
+                self.exact_duplicates += 1
+                continue
+            self._exact[digest] = vacancy_id
+
+            if self.bands:
+                duplicate_of = self._find_near_duplicate(vacancy_id, self._signature(text))
+                if duplicate_of is not None:
+                    self.representatives[vacancy_id] = duplicate_of
+                    self.near_duplicates += 1
+                    continue
+
+            self.representatives[vacancy_id] = vacancy_id
+            unique_items.append(item)
+
+        return unique_items
+
+    def representative_of(self, item: dict):
+        """Возвращает ID вакансии, которая представляет item после дедупликации."""
+        vacancy_id = item.get("id")
+        return self.representatives.get(vacancy_id, vacancy_id)
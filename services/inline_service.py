@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from services.search_service import fetch_vacancies, normalize_query
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# Пауза после нажатия клавиши, в течение которой ждём следующий символ (секунды)
+INLINE_DEBOUNCE = float(os.getenv("INLINE_DEBOUNCE", 0.3))
+# Максимальное время ответа на inline-запрос, включая паузу (секунды)
+INLINE_LATENCY_BUDGET = float(os.getenv("INLINE_LATENCY_BUDGET", 1.5))
+# Количество вакансий в ответе (Telegram принимает не больше 50)
+INLINE_RESULTS = int(os.getenv("INLINE_RESULTS", 20))
+# Сколько вакансий запрашивать у HH на один запрос (не больше 100): из этого запаса
+# уточняющие запросы фильтруются локально, без обращения к HH
+INLINE_POOL_SIZE = int(os.getenv("INLINE_POOL_SIZE", 100))
+# Размер кэша запросов и время жизни записей (секунды)
+INLINE_CACHE_SIZE = int(os.getenv("INLINE_CACHE_SIZE", 5000))
+INLINE_CACHE_TTL = int(os.getenv("INLINE_CACHE_TTL", 300))
+
+
+def matches_query(item: dict, query: str) -> bool:
+    """
+    Проверяет, что все слова запроса встречаются в названии или описании вакансии.
+    Используется для локальной фильтрации результатов более короткого запроса.
+    """
+    snippet = item.get("snippet") or {}
+    text = " ".join([
+        item.get("name") or "",
+        snippet.get("requirement") or "",
+        snippet.get("responsibility") or "",
+    ]).lower()
+    return all(word in text for word in query.split())
+
+
+class CachedResult:
+    """Вакансии, полученные у HH по одному запросу."""
+
+    def __init__(self, items: list, found: int):
+        self.items = items
+        self.found = found
+        # Все найденные вакансии уже в кэше: запрос с дополнительными словами можно отфильтровать локально
+        self.complete = found <= len(items)
+        self.expires_at = time.monotonic() + INLINE_CACHE_TTL
+
+
+class InlineSearch:
+    """
+    Поиск для inline-режима: кэш по префиксам, пауза между нажатиями клавиш,
+    отмена устаревших запросов пользователя и ограничение времени ответа.
+    """
+
+    def __init__(self, max_size: int = INLINE_CACHE_SIZE):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._pending = {}
+        # Выполняющиеся запросы к HH по тексту запроса: одинаковые запросы разных пользователей объединяются
+        self._inflight = {}
+
+    def _get_cached(self, query: str) -> Optional[CachedResult]:
+        entry = self._cache.get(query)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._cache[query]
+            return None
+        self._cache.move_to_end(query)
+        return entry
+
+    def _put_cached(self, query: str, entry: CachedResult):
+        self._cache[query] = entry
+        self._cache.move_to_end(query)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _longest_prefix(self, query: str) -> Optional[CachedResult]:
+        """
+        Находит закэшированный результат для самого длинного префикса запроса.
+        Годится только для запасного ответа: HH ищет по словам, поэтому «pyt» и «python» — разные запросы.
+        """
+        for length in range(len(query) - 1, 0, -1):
+            entry = self._get_cached(query[:length].rstrip())
+            if entry:
+                return entry
+        return None
+
+    def _longest_word_prefix(self, query: str) -> Optional[CachedResult]:
+        """
+        Находит закэшированный результат для самого длинного запроса из первых целых слов query.
+        HH требует совпадения всех слов, поэтому вакансии по «python dev» — подмножество вакансий по «python».
+        """
+        words = query.split()
+        for count in range(len(words) - 1, 0, -1):
+            entry = self._get_cached(" ".join(words[:count]))
+            if entry:
+                return entry
+        return None
+
+    def _from_cache(self, query: str) -> Optional[list]:
+        """
+        Ответ без обращения к HH: точное совпадение или запас вакансий запроса из первых целых слов,
+        если после фильтрации в нем хватает вакансий на полный ответ.
+        """
+        entry = self._get_cached(query)
+        if entry:
+            return entry.items[:INLINE_RESULTS]
+
+        entry = self._longest_word_prefix(query)
+        if entry:
+            items = [item for item in entry.items if matches_query(item, query)]
+            if entry.complete or len(items) >= INLINE_RESULTS:
+                self._put_cached(query, CachedResult(items, len(items) if entry.complete else entry.found))
+                return items[:INLINE_RESULTS]
+        return None
+
+    def _fallback(self, query: str) -> list:
+        """Запасной ответ, если HH не уложился в отведенное время."""
+        entry = self._longest_prefix(query)
+        if not entry:
+            return []
+        return [item for item in entry.items if matches_query(item, query)][:INLINE_RESULTS]
+
+    async def _load(self, query: str) -> list:
+        data = await fetch_vacancies(query=query, page=0, per_page=INLINE_POOL_SIZE)
+        items = data.get("items", []) if data else []
+        if data:
+            self._put_cached(query, CachedResult(items, data.get("found", len(items))))
+        return items[:INLINE_RESULTS]
+
+    def _fetch(self, query: str) -> asyncio.Task:
+        """Запрос к HH или уже выполняющийся запрос с тем же текстом."""
+        task = self._inflight.get(query)
+        if task is None:
+            task = asyncio.ensure_future(self._load(query))
+            self._inflight[query] = task
+            task.add_done_callback(lambda done: self._inflight.pop(query, None))
+        return task
+
+    async def _debounced_fetch(self, query: str) -> list:
+        await asyncio.sleep(INLINE_DEBOUNCE)
+        # За время паузы мог загрузиться запас вакансий более короткого запроса
+        cached = self._from_cache(query)
+        if cached is not None:
+            return cached
+        # shield: начатый запрос к HH не отменяется следующим нажатием и попадает в кэш
+        return await asyncio.shield(self._fetch(query))
+
+    async def lookup(self, user_id: int, query: str):
+        """
+        Ищет вакансии для inline-запроса пользователя.
+        :param user_id: ID пользователя.
+        :param query: Текст inline-запроса.
+        :return: (список вакансий, окончательный ли это ответ) или None, если запрос устарел.
+        """
+        query = normalize_query(query)
+        if not query:
+            return [], True
+
+        cached = self._from_cache(query)
+        if cached is not None:
+            return cached, True
+
+        # Новое нажатие клавиши отменяет ожидание предыдущего запроса пользователя;
+        # уже начатый запрос к HH при этом завершается и заполняет кэш
+        previous = self._pending.pop(user_id, None)
+        if previous:
+            previous.cancel()
+
+        task = asyncio.ensure_future(self._debounced_fetch(query))
+        self._pending[user_id] = task
+        task.add_done_callback(
+            lambda done: self._pending.pop(user_id) if self._pending.get(user_id) is done else None
+        )
+
+        try:
+            # shield: по истечении времени загрузка продолжается и заполняет кэш для следующих нажатий
+            return await asyncio.wait_for(asyncio.shield(task), timeout=INLINE_LATENCY_BUDGET), True
+        except asyncio.TimeoutError:
+            return self._fallback(query), False
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return None
+            raise
+
+
+inline_search_cache = InlineSearch()
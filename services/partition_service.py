@@ -0,0 +1,164 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from services.search_service import (
+    DEFAULT_AREA,
+    RateBudget,
+    fetch_area_children,
+    fetch_vacancies,
+    hh_budget,
+)
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# HH отдает не больше 2000 вакансий на один поисковый запрос
+HH_MAX_DEPTH = 2000
+# Сколько вакансий максимум загружать для одного анализа
+ANALYZE_MAX_VACANCIES = int(os.getenv("ANALYZE_MAX_VACANCIES", 20000))
+# За какой период (дней) делить запрос по дате публикации и минимальный интервал деления (часов)
+PARTITION_DAYS = int(os.getenv("PARTITION_DAYS", 30))
+PARTITION_MIN_HOURS = int(os.getenv("PARTITION_MIN_HOURS", 1))
+
+HH_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class PartitionedFetch:
+    """
+    Загрузка вакансий сверх лимита глубины поиска HH.
+    Если по запросу найдено больше 2000 вакансий, он делится на подзапросы:
+    сначала по дочерним регионам, затем пополам по дате публикации, пока каждая часть
+    не уместится в лимит. Части загружаются параллельно под общим лимитом обращений процесса,
+    вакансии дедуплицируются по ID и отдаются порциями по мере загрузки.
+    """
+
+    def __init__(self, query: str, max_vacancies: int = ANALYZE_MAX_VACANCIES,
+                 per_page: int = 100, budget: RateBudget = None):
+        self.query = query
+        self.max_vacancies = max_vacancies
+        self.per_page = per_page
+        self.budget = budget or hh_budget
+        # Сколько вакансий HH нашел по исходному запросу
+        self.found = 0
+        self.partitions = 0
+        self._seen = set()
+        self._queue = asyncio.Queue()
+
+    @property
+    def loaded(self) -> int:
+        """Количество уникальных загруженных вакансий."""
+        return len(self._seen)
+
+    @property
+    def expected(self) -> int:
+        """Сколько вакансий ожидается загрузить."""
+        return max(min(self.found, self.max_vacancies), 1)
+
+    def _is_full(self) -> bool:
+        return self.loaded >= self.max_vacancies
+
+    async def _fetch_page(self, filters: dict, page: int) -> dict:
+        async with self.budget:
+            return await fetch_vacancies(self.query, page=page, per_page=self.per_page, **filters)
+
+    async def _emit(self, items: list):
+        batch = []
+        for item in items:
+            if self._is_full():
+                break
+            vacancy_id = item.get("id")
+            if vacancy_id in self._seen:
+                continue
+            self._seen.add(vacancy_id)
+            batch.append(item)
+        if batch:
+            await self._queue.put(batch)
+
+    async def _fetch_and_emit(self, filters: dict, page: int):
+        if self._is_full():
+            return
+        data = await self._fetch_page(filters, page)
+        if data and "items" in data:
+            await self._emit(data["items"])
+
+    async def _split(self, filters: dict) -> list:
+        """
+        Делит часть запроса на подзапросы: по дочерним регионам, а если их нет — по дате.
+        :return: Список фильтров подзапросов (пустой, если делить дальше нельзя).
+        """
+        if "date_from" not in filters and "date_to" not in filters:
+            children = await fetch_area_children(filters.get("area", DEFAULT_AREA))
+            if children:
+                return [dict(filters, area=child) for child in children]
+
+        now = datetime.now().replace(microsecond=0)
+        date_to = datetime.strptime(filters["date_to"], HH_DATE_FORMAT) if "date_to" in filters else now
+
+        # Часть без начальной даты: последние PARTITION_DAYS дней и открытая часть со всеми более
+        # ранними вакансиями, которая при необходимости делится так же, — вместе они покрывают всю выдачу
+        if "date_from" not in filters:
+            date_from = date_to - timedelta(days=PARTITION_DAYS)
+            return [
+                dict(filters, date_from=date_from.strftime(HH_DATE_FORMAT), date_to=date_to.strftime(HH_DATE_FORMAT)),
+                dict(filters, date_to=date_from.strftime(HH_DATE_FORMAT)),
+            ]
+
+        date_from = datetime.strptime(filters["date_from"], HH_DATE_FORMAT)
+        if date_to - date_from <= timedelta(hours=PARTITION_MIN_HOURS):
+            return []
+
+        middle = date_from + (date_to - date_from) / 2
+        return [
+            dict(filters, date_from=date_from.strftime(HH_DATE_FORMAT), date_to=middle.strftime(HH_DATE_FORMAT)),
+            dict(filters, date_from=middle.strftime(HH_DATE_FORMAT), date_to=date_to.strftime(HH_DATE_FORMAT)),
+        ]
+
+    async def _fetch_partition(self, filters: dict, is_root: bool = False):
+        if self._is_full():
+            return
+
+        first_page = await self._fetch_page(filters, 0)
+        if not first_page or "items" not in first_page:
+            return
+
+        found = first_page.get("found", 0)
+        if is_root:
+            self.found = found
+
+        if found > HH_MAX_DEPTH:
+            subqueries = await self._split(filters)
+            if subqueries:
+                await asyncio.gather(*(self._fetch_partition(subquery) for subquery in subqueries))
+                return
+            # Дальше делить некуда — берем первые 2000 вакансий этой части
+
+        self.partitions += 1
+        await self._emit(first_page["items"])
+        pages = min(first_page.get("pages", 1), HH_MAX_DEPTH // self.per_page)
+        await asyncio.gather(*(self._fetch_and_emit(filters, page) for page in range(1, pages)))
+
+    async def _produce(self):
+        try:
+            await self._fetch_partition({}, is_root=True)
+        except Exception as e:
+            print(f"Ошибка при загрузке вакансий: {e}")
+        finally:
+            # None — признак окончания загрузки
+            await self._queue.put(None)
+
+    async def stream(self):
+        """
+        Асинхронно отдает порции новых (ранее не встречавшихся) вакансий по мере загрузки.
+        """
+        producer = asyncio.ensure_future(self._produce())
+        try:
+            while True:
+                batch = await self._queue.get()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            producer.cancel()
@@ -0,0 +1,94 @@
+import json
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from services.state_service import get_store
+
+
+class SharedPersistence(BasePersistence):
+    """
+    Persistence для PTB поверх общего хранилища (Redis или MemoryStore).
+    Хранит состояния ConversationHandler и user_data, чтобы их видели все экземпляры бота.
+    """
+
+    def __init__(self, store=None, update_interval: float = 1):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.store = store or get_store()
+
+    async def _load_json(self, key: str):
+        value = await self.store.get(key)
+        return json.loads(value) if value is not None else None
+
+    # user_data
+    async def get_user_data(self) -> dict:
+        user_data = {}
+        for key in await self.store.keys("user_data:"):
+            data = await self._load_json(key)
+            if data is not None:
+                user_data[int(key.removeprefix("user_data:"))] = data
+        return user_data
+
+    async def update_user_data(self, user_id: int, data: dict):
+        await self.store.set(f"user_data:{user_id}", json.dumps(data))
+
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        # Перед обработкой обновления подтягиваем свежие данные, записанные другими экземплярами
+        data = await self._load_json(f"user_data:{user_id}")
+        if data is not None:
+            user_data.clear()
+            user_data.update(data)
+
+    async def drop_user_data(self, user_id: int):
+        await self.store.delete(f"user_data:{user_id}")
+
+    # Состояния диалогов
+    async def get_conversations(self, name: str) -> dict:
+        prefix = f"conversation:{name}:"
+        conversations = {}
+        for key in await self.store.keys(prefix):
+            state = await self._load_json(key)
+            if state is not None:
+                conversations[tuple(json.loads(key.removeprefix(prefix)))] = state
+        return conversations
+
+    async def update_conversation(self, name: str, key: tuple, new_state):
+        store_key = f"conversation:{name}:{json.dumps(list(key))}"
+        if new_state is None:
+            await self.store.delete(store_key)
+        else:
+            await self.store.set(store_key, json.dumps(new_state))
+
+    # chat_data, bot_data и callback_data не используются ботом
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def update_chat_data(self, chat_id: int, data: dict):
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        pass
+
+    async def drop_chat_data(self, chat_id: int):
+        pass
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def update_bot_data(self, data: dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict):
+        pass
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def flush(self):
+        # Все изменения пишутся в хранилище сразу, буферизации нет
+        pass
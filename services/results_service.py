@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from services.search_service import fetch_vacancies
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# Сколько вакансий запрашивать у HH за раз (дальше страницы нарезаются локально)
+HH_CHUNK_SIZE = int(os.getenv("PER_PAGE", 50))
+# Количество вакансий на одной странице в чате
+RESULTS_PER_PAGE = int(os.getenv("RESULTS_PER_PAGE", 5))
+# Сколько чатов держать в буфере и как долго (секунды)
+RESULTS_BUFFER_SIZE = int(os.getenv("RESULTS_BUFFER_SIZE", 1000))
+RESULTS_BUFFER_TTL = int(os.getenv("RESULTS_BUFFER_TTL", 900))
+
+
+class ChatResults:
+    """Результаты поиска одного чата, загружаемые у HH порциями."""
+
+    def __init__(self, query: str):
+        self.query = query
+        # Короткий идентификатор поиска: кнопки листания старых сообщений не должны показывать новый поиск
+        self.token = uuid.uuid4().hex[:8]
+        self.items = []
+        self.found = 0
+        self.next_hh_page = 0
+        self.exhausted = False
+        self.lock = asyncio.Lock()
+        self.expires_at = time.monotonic() + RESULTS_BUFFER_TTL
+
+    async def ensure(self, count: int):
+        """
+        Догружает вакансии у HH, пока их меньше count или пока HH не отдаст всё.
+        :param count: Необходимое количество вакансий в буфере.
+        """
+        # Блокировка не дает предзагрузке и показу страницы запросить одну порцию дважды
+        async with self.lock:
+            while len(self.items) < count and not self.exhausted:
+                data = await fetch_vacancies(self.query, page=self.next_hh_page, per_page=HH_CHUNK_SIZE)
+                if not data or "items" not in data:
+                    self.exhausted = True
+                    break
+
+                self.items.extend(data["items"])
+                self.found = data.get("found", len(self.items))
+                self.next_hh_page += 1
+
+                # HH отдает не больше pages страниц (глубина поиска ограничена 2000 вакансий)
+                if len(data["items"]) < HH_CHUNK_SIZE or self.next_hh_page >= data.get("pages", 0):
+                    self.exhausted = True
+
+    def page_count(self, per_page: int) -> int:
+        """Количество страниц, известное на данный момент."""
+        total = len(self.items) if self.exhausted else max(len(self.items), min(self.found, 2000))
+        return max((total + per_page - 1) // per_page, 1)
+
+
+class SearchResultsBuffer:
+    """
+    Буфер результатов поиска по чатам с ограничением размера (LRU) и временем жизни.
+    """
+
+    def __init__(self, max_chats: int = RESULTS_BUFFER_SIZE, ttl: int = RESULTS_BUFFER_TTL):
+        self.max_chats = max_chats
+        self.ttl = ttl
+        self._chats = OrderedDict()
+
+    def _evict(self):
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, entry in self._chats.items() if entry.expires_at <= now]:
+            del self._chats[chat_id]
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+
+    def start(self, chat_id: int, query: str) -> ChatResults:
+        """Начинает новый поиск для чата, заменяя предыдущие результаты."""
+        entry = ChatResults(query)
+        self._chats[chat_id] = entry
+        self._chats.move_to_end(chat_id)
+        self._evict()
+        return entry
+
+    def get(self, chat_id: int, token: str = None):
+        """
+        Возвращает результаты чата или None, если они устарели или вытеснены.
+        :param token: Идентификатор поиска; если в чате уже выполнен другой поиск, возвращается None.
+        """
+        self._evict()
+        entry = self._chats.get(chat_id)
+        if entry and token is not None and entry.token != token:
+            return None
+        if entry:
+            entry.expires_at = time.monotonic() + self.ttl
+            self._chats.move_to_end(chat_id)
+        return entry
+
+    async def get_page(self, chat_id: int, page: int, token: str = None, per_page: int = RESULTS_PER_PAGE):
+        """
+        Возвращает вакансии страницы page и общее число страниц.
+        :param token: Идентификатор поиска, к которому относится страница.
+        :return: (список вакансий, количество страниц) или (None, 0), если результатов нет.
+        """
+        entry = self.get(chat_id, token)
+        if not entry:
+            return None, 0
+
+        await entry.ensure((page + 1) * per_page)
+        items = entry.items[page * per_page:(page + 1) * per_page]
+        return items, entry.page_count(per_page)
+
+    async def prefetch(self, chat_id: int, page: int, token: str = None, per_page: int = RESULTS_PER_PAGE):
+        """Фоново подгружает страницу page, чтобы листание обслуживалось из памяти."""
+        entry = self._chats.get(chat_id)
+        if entry and (token is None or entry.token == token):
+            try:
+                await entry.ensure((page + 1) * per_page)
+            except Exception as e:
+                print(f"Ошибка предзагрузки результатов поиска: {e}")
+
+
+search_results = SearchResultsBuffer()
@@ -0,0 +1,316 @@
+import asyncio
+import os
+from datetime import date, datetime, time
+
+from dotenv import load_dotenv
+
+from services.database_service import get_connection
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# Сколько месяцев хранить сырую историю запросов (дневные сводки хранятся бессрочно)
+SEARCH_HISTORY_RETENTION_MONTHS = int(os.getenv("SEARCH_HISTORY_RETENTION_MONTHS", 12))
+# На сколько месяцев вперед заранее создавать партиции
+SEARCH_HISTORY_PARTITIONS_AHEAD = int(os.getenv("SEARCH_HISTORY_PARTITIONS_AHEAD", 2))
+# Как часто бот выполняет обслуживание базы (секунды)
+DB_MAINTENANCE_INTERVAL = int(os.getenv("DB_MAINTENANCE_INTERVAL", 86400))
+
+PARTITION_PREFIX = "search_history_p"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_history (
+    id BIGSERIAL,
+    user_id BIGINT NOT NULL,
+    search_query TEXT NOT NULL,
+    search_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, search_date)
+) PARTITION BY RANGE (search_date);
+
+-- Страховочная партиция для строк, для месяца которых партиция еще не создана
+CREATE TABLE IF NOT EXISTS search_history_default PARTITION OF search_history DEFAULT;
+
+CREATE INDEX IF NOT EXISTS search_history_user_date_idx ON search_history (user_id, search_date DESC);
+
+CREATE TABLE IF NOT EXISTS search_history_daily (
+    day DATE NOT NULL,
+    search_query TEXT NOT NULL,
+    searches INTEGER NOT NULL,
+    users INTEGER NOT NULL,
+    PRIMARY KEY (day, search_query)
+);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    chat_id BIGINT NOT NULL,
+    search_query TEXT NOT NULL,
+    normalized_query TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (chat_id, normalized_query)
+);
+
+CREATE TABLE IF NOT EXISTS subscription_queries (
+    normalized_query TEXT PRIMARY KEY,
+    last_checked TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Запросы для синтетических данных
+SEED_QUERIES = [
+    "python", "python developer", "go", "golang", "java", "kotlin", "devops", "data scientist",
+    "frontend", "react", "qa", "аналитик", "1с", "c++", "php", "ios", "android", "sre",
+]
+
+
+def month_start(value) -> date:
+    """Первый день месяца для даты value."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Сдвигает первый день месяца на months месяцев."""
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Имя партиции истории запросов за месяц, например search_history_p202401."""
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+async def _relation_kind(connection, name: str):
+    """Тип таблицы: 'r' — обычная, 'p' — партиционированная, None — таблицы нет."""
+    return await connection.fetchval(
+        "SELECT relkind::text FROM pg_class WHERE relname = $1 AND relnamespace = 'public'::regnamespace;",
+        name
+    )
+
+
+async def create_partition(connection, month: date):
+    """
+    Создает партицию за месяц, если ее еще нет.
+    Строки этого месяца, попавшие в страховочную партицию, переносятся в новую.
+    """
+    name = partition_name(month)
+    if await _relation_kind(connection, name):
+        return
+
+    start, end = month, add_months(month, 1)
+    async with connection.transaction():
+        await connection.execute(
+            f"CREATE TABLE {name} (LIKE search_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS);"
+        )
+        await connection.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM search_history_default
+                WHERE search_date >= '{start}' AND search_date < '{end}'
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved;
+            """
+        )
+        await connection.execute(
+            f"ALTER TABLE search_history ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}');"
+        )
+
+
+async def ensure_partitions(connection, first_month: date = None, months_ahead: int = SEARCH_HISTORY_PARTITIONS_AHEAD):
+    """
+    Создает партиции с first_month (по умолчанию с текущего месяца) до months_ahead месяцев вперед.
+    """
+    current = month_start(datetime.now())
+    month = first_month or current
+    last = add_months(current, months_ahead)
+    while month <= last:
+        await create_partition(connection, month)
+        month = add_months(month, 1)
+
+
+async def migrate_legacy_history(connection):
+    """
+    Переносит историю из старой непартиционированной таблицы search_history в партиционированную.
+    """
+    async with connection.transaction():
+        await connection.execute("ALTER TABLE search_history RENAME TO search_history_legacy;")
+        await connection.execute("ALTER INDEX IF EXISTS search_history_pkey RENAME TO search_history_legacy_pkey;")
+        await connection.execute(SCHEMA)
+
+        oldest = await connection.fetchval("SELECT MIN(search_date) FROM search_history_legacy;")
+        await ensure_partitions(connection, month_start(oldest) if oldest else None)
+
+        await connection.execute(
+            """
+            INSERT INTO search_history (id, user_id, search_query, search_date)
+            SELECT id, user_id, search_query, COALESCE(search_date, NOW()) FROM search_history_legacy;
+            """
+        )
+        await connection.execute(
+            """
+            SELECT setval(pg_get_serial_sequence('search_history', 'id'), COALESCE(MAX(id), 0) + 1, false)
+            FROM search_history;
+            """
+        )
+        await connection.execute("DROP TABLE search_history_legacy;")
+
+
+async def apply_schema(connection):
+    """
+    Создает или обновляет схему базы: партиционированную историю запросов,
+    дневные сводки, таблицы подписок и партиции на ближайшие месяцы.
+    """
+    if await _relation_kind(connection, "search_history") == "r":
+        print("Найдена непартиционированная таблица search_history, переносим данные...")
+        await migrate_legacy_history(connection)
+
+    await connection.execute(SCHEMA)
+    await ensure_partitions(connection)
+
+
+async def rollup_search_history(connection, until: date = None) -> int:
+    """
+    Пересчитывает дневные сводки по запросам за завершенные дни.
+    Начинает с последнего уже посчитанного дня, поэтому повторный запуск безопасен.
+    :param until: Первый день, который не входит в пересчет (по умолчанию — сегодня).
+    :return: Количество обновленных строк сводки.
+    """
+    until = until or date.today()
+    since = await connection.fetchval("SELECT MAX(day) FROM search_history_daily;")
+    if since is None:
+        oldest = await connection.fetchval("SELECT MIN(search_date) FROM search_history;")
+        if oldest is None:
+            return 0
+        since = oldest.date()
+
+    status = await connection.execute(
+        """
+        INSERT INTO search_history_daily (day, search_query, searches, users)
+        SELECT search_date::date, search_query, COUNT(*), COUNT(DISTINCT user_id)
+        FROM search_history
+        WHERE search_date >= $1 AND search_date < $2
+        GROUP BY search_date::date, search_query
+        ON CONFLICT (day, search_query) DO UPDATE
+        SET searches = EXCLUDED.searches, users = EXCLUDED.users;
+        """,
+        datetime.combine(since, time.min), datetime.combine(until, time.min)
+    )
+    return int(status.split()[-1])
+
+
+async def drop_old_partitions(connection, retention_months: int = SEARCH_HISTORY_RETENTION_MONTHS) -> list:
+    """
+    Удаляет партиции истории запросов старше retention_months месяцев.
+    Перед удалением досчитывает дневные сводки, чтобы аналитика не потеряла данные.
+    :return: Список удаленных партиций.
+    """
+    cutoff = add_months(month_start(datetime.now()), -retention_months)
+    rows = await connection.fetch(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'search_history' AND child.relname LIKE $1;
+        """,
+        f"{PARTITION_PREFIX}%"
+    )
+    expired = sorted(
+        row['relname'] for row in rows
+        if datetime.strptime(row['relname'].removeprefix(PARTITION_PREFIX), "%Y%m").date() < cutoff
+    )
+    if not expired:
+        return []
+
+    await rollup_search_history(connection)
+    for name in expired:
+        async with connection.transaction():
+            await connection.execute(f"ALTER TABLE search_history DETACH PARTITION {name};")
+            await connection.execute(f"DROP TABLE {name};")
+    return expired
+
+
+async def run_maintenance():
+    """
+    Обслуживание истории запросов: партиции на будущие месяцы, дневные сводки и удаление старых партиций.
+    """
+    connection = await get_connection()
+    if not connection:
+        return
+
+    try:
+        await ensure_partitions(connection)
+        updated = await rollup_search_history(connection)
+        dropped = await drop_old_partitions(connection)
+        print(f"Обслуживание базы: обновлено строк сводки — {updated}, удалено партиций — {len(dropped)}")
+    except Exception as e:
+        print(f"Ошибка при обслуживании базы данных: {e}")
+    finally:
+        await connection.close()
+
+
+async def run_maintenance_loop(interval: int = DB_MAINTENANCE_INTERVAL):
+    """Периодически выполняет обслуживание базы в фоне."""
+    while True:
+        await run_maintenance()
+        await asyncio.sleep(interval)
+
+
+async def seed_search_history(connection, rows: int, months: int, users: int = 10000):
+    """
+    Заполняет историю синтетическими запросами, равномерно распределенными по последним months месяцам.
+    Данные генерируются на стороне PostgreSQL, поэтому миллионы строк вставляются за секунды.
+    """
+    await ensure_partitions(connection, add_months(month_start(datetime.now()), -months))
+    await connection.execute(
+        """
+        INSERT INTO search_history (user_id, search_query, search_date)
+        SELECT (random() * $2)::bigint,
+               ($3::text[])[1 + floor(random() * array_length($3::text[], 1))::int],
+               NOW() - random() * make_interval(days => $4)
+        FROM generate_series(1, $1);
+        """,
+        rows, users, SEED_QUERIES, months * 30
+    )
+
+
+async def verify_rollup(connection, until: date = None) -> list:
+    """
+    Сверяет дневные сводки с сырыми данными за дни, которые еще хранятся в партициях.
+    :return: Список расхождений (day, search_query, в сводке, в истории).
+    """
+    until = until or date.today()
+    rows = await connection.fetch(
+        """
+        SELECT raw.day, raw.search_query, daily.searches AS rolled_up, raw.searches
+        FROM (
+            SELECT search_date::date AS day, search_query, COUNT(*) AS searches
+            FROM search_history
+            WHERE search_date < $1
+            GROUP BY 1, 2
+        ) raw
+        LEFT JOIN search_history_daily daily USING (day, search_query)
+        WHERE daily.searches IS DISTINCT FROM raw.searches;
+        """,
+        datetime.combine(until, time.min)
+    )
+    return [(row['day'], row['search_query'], row['rolled_up'], row['searches']) for row in rows]
+
+
+async def describe_partitions(connection) -> list:
+    """Возвращает партиции истории запросов с количеством строк."""
+    rows = await connection.fetch(
+        """
+        SELECT child.relname AS name
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'search_history'
+        ORDER BY child.relname;
+        """
+    )
+    result = []
+    for row in rows:
+        count = await connection.fetchval(f"SELECT COUNT(*) FROM {row['name']};")
+        result.append((row['name'], count))
+    return result
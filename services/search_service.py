@@ -1,3 +1,4 @@
+import asyncio
 from typing import List
 
 import aiohttp
@@ -8,22 +9,72 @@ from dotenv import load_dotenv
 load_dotenv()
 
 HH_API_URL = os.getenv("HH_API_URL") or "https://api.hh.ru/vacancies"
+HH_AREAS_URL = os.getenv("HH_AREAS_URL") or HH_API_URL.rsplit("/", 1)[0] + "/areas"
+# По умолчанию ищем по всей России
+DEFAULT_AREA = 113
+# Сколько запросов к HH одновременно могут выполнять все массовые загрузки процесса
+HH_MAX_CONCURRENCY = int(os.getenv("HH_MAX_CONCURRENCY", 5))
+# Сколько запросов к HH в секунду могут выполнять все массовые загрузки процесса (0 — без ограничения)
+HH_RATE_LIMIT = float(os.getenv("HH_RATE_LIMIT", 10))
 
+# Дерево регионов HH меняется редко, поэтому кэшируем его на время работы процесса
+_area_children = {}
 
-async def fetch_vacancies(query: str, page: int = 0, per_page: int = 10) -> dict:
+
+class RateBudget:
+    """
+    Лимит обращений к HH: не больше max_concurrency запросов одновременно
+    и не чаще rate запросов в секунду.
+    """
+
+    def __init__(self, max_concurrency: int = HH_MAX_CONCURRENCY, rate: float = HH_RATE_LIMIT):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._interval = 1 / rate if rate else 0
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            if self._interval:
+                now = asyncio.get_running_loop().time()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + self._interval
+                if slot > now:
+                    await asyncio.sleep(slot - now)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+
+# Единый лимит процесса: анализы, сравнения и проверка подписок вместе не превышают его,
+# сколько бы загрузок ни выполнялось одновременно
+hh_budget = RateBudget()
+
+
+def normalize_query(query: str) -> str:
+    """Приводит запрос к единому виду: нижний регистр, одиночные пробелы."""
+    return " ".join(query.lower().split())
+
+
+async def fetch_vacancies(query: str, page: int = 0, per_page: int = 10, **filters) -> dict:
     """
     Асинхронный API запрос для поиска вакансий.
     :param query: Текстовый запрос для поиска вакансий.
     :param page: Номер страницы.
     :param per_page: Количество вакансий на странице.
+    :param filters: Дополнительные фильтры HH API (area, date_from, date_to и т.д.).
     :return: Словарь с результатами поиска.
     """
     params = {
         "text": query,
-        "area": 113,  # По умолчанию Россия
+        "area": DEFAULT_AREA,  # По умолчанию Россия
         "page": page,
         "per_page": per_page
     }
+    params.update(filters)
 
     async with aiohttp.ClientSession() as session:
         try:
@@ -72,6 +123,55 @@ async def fetch_all_vacancies(query: str, total_vacancies: int = 2000) -> List[d
     return all_vacancies[:total_vacancies]
 
 
+async def fetch_query_pages(query: str, total_vacancies: int, budget: RateBudget = hh_budget,
+                            per_page: int = 100, on_page=None) -> List[dict]:
+    """
+    Загружает страницы одного запроса параллельно, соблюдая общий лимит обращений к HH.
+    :param query: Текстовый запрос для поиска вакансий.
+    :param total_vacancies: Сколько вакансий загрузить.
+    :param budget: Лимит обращений к HH (по умолчанию общий лимит процесса).
+    :param per_page: Количество вакансий на странице.
+    :param on_page: Асинхронный обратный вызов с числом загруженных вакансий страницы.
+    :return: Список вакансий.
+    """
+    async def fetch_page(page: int) -> dict:
+        async with budget:
+            data = await fetch_vacancies(query, page, per_page)
+        items = data.get("items", []) if data else []
+        if on_page:
+            await on_page(len(items))
+        return data
+
+    # Первая страница сообщает, сколько всего страниц доступно
+    first_page = await fetch_page(0)
+    if not first_page or "items" not in first_page:
+        return []
+
+    pages = min(first_page.get("pages", 1), -(-total_vacancies // per_page))
+    other_pages = await asyncio.gather(*(fetch_page(page) for page in range(1, pages)))
+
+    vacancies = list(first_page["items"])
+    for data in other_pages:
+        if data:
+            vacancies.extend(data.get("items", []))
+
+    return vacancies[:total_vacancies]
+
+
+async def fetch_many_queries(queries: List[str], total_per_query: int = 2000, on_page=None) -> dict:
+    """
+    Загружает вакансии нескольких запросов одновременно под общим лимитом обращений к HH.
+    :param queries: Список текстовых запросов.
+    :param total_per_query: Сколько вакансий загрузить по каждому запросу.
+    :param on_page: Асинхронный обратный вызов с числом загруженных вакансий страницы.
+    :return: Словарь {запрос: список вакансий}.
+    """
+    results = await asyncio.gather(
+        *(fetch_query_pages(query, total_per_query, on_page=on_page) for query in queries)
+    )
+    return dict(zip(queries, results))
+
+
 async def fetch_vacancy_details(vacancy_id: str) -> dict:
     """
     Асинхронный API запрос для получения деталей конкретной вакансии.
@@ -91,3 +191,32 @@ async def fetch_vacancy_details(vacancy_id: str) -> dict:
         except Exception as e:
             print(f"Unexpected Error: {e}")
             return {}
+
+
+async def fetch_area_children(area_id) -> list:
+    """
+    Возвращает ID дочерних регионов HH (например, субъектов РФ для России).
+    :param area_id: ID региона.
+    :return: Список ID дочерних регионов (пустой для конечных регионов или при ошибке).
+    """
+    area_id = str(area_id)
+    if area_id in _area_children:
+        return _area_children[area_id]
+
+    async with aiohttp.ClientSession() as session:
+        try:
+            async with session.get(f"{HH_AREAS_URL}/{area_id}") as response:
+                response.raise_for_status()
+                data = await response.json()
+        except Exception as e:
+            print(f"Ошибка при загрузке регионов HH: {e}")
+            return []
+
+    # Запоминаем все поддерево, чтобы не запрашивать его повторно
+    def remember(area: dict):
+        _area_children[str(area["id"])] = [str(child["id"]) for child in area.get("areas", [])]
+        for child in area.get("areas", []):
+            remember(child)
+
+    remember(data)
+    return _area_children.get(area_id, [])
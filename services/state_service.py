@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# memory — локальная замена внутри одного процесса, redis — общее хранилище для нескольких экземпляров
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Разбиение обновлений по chat_id между экземплярами бота
+INSTANCE_COUNT = int(os.getenv("INSTANCE_COUNT", 1))
+INSTANCE_INDEX = int(os.getenv("INSTANCE_INDEX", 0))
+
+# Время жизни блокировки пользователя (секунды), чтобы упавший экземпляр не держал её вечно
+USER_LOCK_TTL = int(os.getenv("USER_LOCK_TTL", 600))
+
+# Lua-скрипт: удаляет ключ, только если в нём лежит наш токен
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class MemoryStore:
+    """
+    Хранилище ключ-значение в памяти процесса.
+    Эмулирует подмножество команд Redis, которое использует бот.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lists = {}
+        self._condition = asyncio.Condition()
+
+    def _alive(self, key: str) -> bool:
+        entry = self._values.get(key)
+        if entry is None:
+            return False
+        _, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return False
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self._alive(key):
+            return None
+        return self._values[key][0]
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None, nx: bool = False) -> bool:
+        if nx and self._alive(key):
+            return False
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._values[key] = (value, expires_at)
+        return True
+
+    async def delete(self, key: str):
+        self._values.pop(key, None)
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        if self._alive(key) and self._values[key][0] == value:
+            del self._values[key]
+            return True
+        return False
+
+    async def keys(self, prefix: str) -> list:
+        return [key for key in list(self._values) if key.startswith(prefix) and self._alive(key)]
+
+    async def push(self, key: str, value: str):
+        async with self._condition:
+            self._lists.setdefault(key, deque()).append(value)
+            self._condition.notify_all()
+
+    async def pop(self, key: str, timeout: float = 1) -> Optional[str]:
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._lists.get(key)),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                return None
+            return self._lists[key].popleft()
+
+
+class RedisStore:
+    """
+    Хранилище ключ-значение в Redis (или совместимом сервере).
+    Используется, когда запущено несколько экземпляров бота.
+    """
+
+    def __init__(self, url: str):
+        # redis нужен только в многоэкземплярном режиме, поэтому импортируем его здесь
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None, nx: bool = False) -> bool:
+        return bool(await self._redis.set(key, value, ex=ttl, nx=nx))
+
+    async def delete(self, key: str):
+        await self._redis.delete(key)
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        return bool(await self._release(keys=[key], args=[value]))
+
+    async def keys(self, prefix: str) -> list:
+        return [key async for key in self._redis.scan_iter(match=f"{prefix}*")]
+
+    async def push(self, key: str, value: str):
+        await self._redis.rpush(key, value)
+
+    async def pop(self, key: str, timeout: float = 1) -> Optional[str]:
+        result = await self._redis.blpop([key], timeout=timeout)
+        return result[1] if result else None
+
+
+_store = None
+
+
+def get_store():
+    """
+    Возвращает общее хранилище состояния, выбранное через STATE_BACKEND.
+    """
+    global _store
+    if _store is None:
+        if STATE_BACKEND == "redis":
+            _store = RedisStore(REDIS_URL)
+        else:
+            _store = MemoryStore()
+    return _store
+
+
+async def acquire_user_lock(user_id, ttl: int = USER_LOCK_TTL) -> Optional[str]:
+    """
+    Пытается захватить блокировку пользователя на всех экземплярах бота.
+    :param user_id: ID пользователя.
+    :param ttl: Время жизни блокировки в секундах.
+    :return: Токен блокировки или None, если она уже занята.
+    """
+    token = uuid.uuid4().hex
+    if await get_store().set(f"lock:user:{user_id}", token, ttl=ttl, nx=True):
+        return token
+    return None
+
+
+async def release_user_lock(user_id, token: str):
+    """
+    Освобождает блокировку пользователя, если она всё ещё принадлежит нам.
+    :param user_id: ID пользователя.
+    :param token: Токен, полученный от acquire_user_lock.
+    """
+    try:
+        await get_store().delete_if_equals(f"lock:user:{user_id}", token)
+    except Exception as e:
+        print(f"Ошибка при освобождении блокировки пользователя: {e}")
+
+
+def partition_for(chat_id: int) -> int:
+    """
+    Определяет номер экземпляра, который обслуживает чат.
+    :param chat_id: ID чата.
+    :return: Номер экземпляра от 0 до INSTANCE_COUNT - 1.
+    """
+    return chat_id % INSTANCE_COUNT
+
+
+def partition_queue(index: int) -> str:
+    """Имя очереди обновлений для экземпляра с номером index."""
+    return f"updates:{index}"
@@ -0,0 +1,136 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from services.database_service import get_subscribed_queries, update_subscription_checked
+from services.search_service import fetch_vacancies, hh_budget
+
+# Загружаем переменные окружения
+load_dotenv()
+
+# Как часто проверять подписки (секунды)
+SUBSCRIPTION_POLL_INTERVAL = int(os.getenv("SUBSCRIPTION_POLL_INTERVAL", 300))
+# Насколько раньше последней проверки начинать поиск: HH индексирует вакансии с задержкой (секунды)
+SUBSCRIPTION_OVERLAP = int(os.getenv("SUBSCRIPTION_OVERLAP", 600))
+# Сколько уведомлений в секунду отправлять (ограничение Telegram — около 30)
+NOTIFY_RATE_LIMIT = float(os.getenv("NOTIFY_RATE_LIMIT", 20))
+
+# Размер страницы при проверке подписок (максимум HH API)
+SUBSCRIPTION_PER_PAGE = 100
+
+HH_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+# ID вакансий, найденных при предыдущей проверке запроса: защищают от повторов в окне перекрытия
+_seen_ids = {}
+
+
+class RateLimitedSender:
+    """
+    Очередь исходящих сообщений, которая отправляет их не чаще rate в секунду
+    и выдерживает паузу, если Telegram просит подождать.
+    """
+
+    def __init__(self, bot, rate: float = NOTIFY_RATE_LIMIT):
+        self.bot = bot
+        self._interval = 1 / rate
+        self._queue = asyncio.Queue()
+
+    async def send(self, chat_id: int, text: str, **kwargs):
+        """Ставит сообщение в очередь на отправку."""
+        await self._queue.put((chat_id, text, kwargs))
+
+    async def run(self):
+        """Отправляет сообщения из очереди, соблюдая ограничение скорости."""
+        while True:
+            chat_id, text, kwargs = await self._queue.get()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after:
+                    if isinstance(retry_after, timedelta):
+                        retry_after = retry_after.total_seconds()
+                    await asyncio.sleep(retry_after)
+                    await self._queue.put((chat_id, text, kwargs))
+                else:
+                    print(f"Ошибка при отправке уведомления: {e}")
+            await asyncio.sleep(self._interval)
+
+
+async def poll_subscriptions_once(notify) -> int:
+    """
+    Одна проверка подписок: по каждому уникальному нормализованному запросу вакансии с date_from
+    загружаются у HH один раз (все страницы), а новые вакансии рассылаются всем подписчикам запроса.
+    :param notify: Асинхронная функция notify(chat_id, query, vacancies).
+    :return: Количество проверенных запросов.
+    """
+    subscriptions = await get_subscribed_queries()
+
+    async def poll_query(normalized_query: str, subscription: dict):
+        checked_at = datetime.now(timezone.utc)
+        date_from = subscription["last_checked"]
+        # Окно перекрытия используем, только если помним вакансии предыдущей проверки
+        if normalized_query in _seen_ids:
+            date_from -= timedelta(seconds=SUBSCRIPTION_OVERLAP)
+
+        # Листаем все страницы окна, иначе вакансии сверх первой сотни терялись бы навсегда
+        items = []
+        page = 0
+        while True:
+            async with hh_budget:
+                data = await fetch_vacancies(
+                    subscription["query"],
+                    page=page,
+                    per_page=SUBSCRIPTION_PER_PAGE,
+                    date_from=date_from.strftime(HH_DATE_FORMAT),
+                    order_by="publication_time",
+                )
+            if not data or "items" not in data:
+                # Без полного списка не сдвигаем время проверки: окно будет проверено заново
+                return
+            items.extend(data["items"])
+            page += 1
+            if len(data["items"]) < SUBSCRIPTION_PER_PAGE or page >= data.get("pages", 0):
+                break
+
+        if len(items) < data.get("found", 0):
+            print(f"Подписка «{subscription['query']}»: загружено {len(items)} из {data['found']} новых вакансий")
+
+        seen = _seen_ids.get(normalized_query, set())
+        new_vacancies = [item for item in items if item.get("id") not in seen]
+        _seen_ids[normalized_query] = {item.get("id") for item in items}
+        await update_subscription_checked(normalized_query, checked_at)
+
+        if new_vacancies:
+            for chat_id in subscription["chat_ids"]:
+                await notify(chat_id, subscription["query"], new_vacancies)
+
+    results = await asyncio.gather(
+        *(poll_query(normalized_query, subscription) for normalized_query, subscription in subscriptions.items()),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Ошибка при проверке подписки: {result}")
+
+    # Забываем запросы, на которые больше никто не подписан
+    for normalized_query in set(_seen_ids) - set(subscriptions):
+        del _seen_ids[normalized_query]
+
+    return len(subscriptions)
+
+
+async def run_subscription_poller(notify, interval: int = SUBSCRIPTION_POLL_INTERVAL):
+    """
+    Периодически проверяет подписки в фоне.
+    :param notify: Асинхронная функция notify(chat_id, query, vacancies).
+    :param interval: Пауза между проверками в секундах.
+    """
+    while True:
+        try:
+            await poll_subscriptions_once(notify)
+        except Exception as e:
+            print(f"Ошибка при проверке подписок: {e}")
+        await asyncio.sleep(interval)
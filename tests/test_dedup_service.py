@@ -0,0 +1,88 @@
+import unittest
+
+from services.dedup_service import VacancyDeduplicator
+
+REQUIREMENT = (
+    "Опыт коммерческой разработки на Python от 3 лет. Уверенное знание Django и Django REST Framework, "
+    "PostgreSQL, Redis, Celery. Опыт работы с Docker и CI/CD, понимание принципов REST."
+)
+RESPONSIBILITY = (
+    "Разработка и поддержка backend-сервисов, проектирование API, код-ревью, "
+    "взаимодействие с командой фронтенда и аналитиками."
+)
+
+
+def vacancy(vacancy_id: str, requirement=None, responsibility=None, snippet=True) -> dict:
+    item = {"id": vacancy_id, "name": "Python-разработчик"}
+    if snippet:
+        item["snippet"] = {"requirement": requirement, "responsibility": responsibility}
+    return item
+
+
+class VacancyDeduplicatorTest(unittest.TestCase):
+    def test_vacancies_without_text_are_unique(self):
+        deduplicator = VacancyDeduplicator()
+        empty = [
+            vacancy("0", snippet=False),
+            vacancy("1"),
+            vacancy("2", requirement="", responsibility=""),
+            vacancy("3", requirement="<highlighttext></highlighttext>"),
+            vacancy("4", responsibility="   "),
+        ]
+        real = [
+            vacancy("a", "Знание Go и gRPC", "Разработка платежного шлюза"),
+            vacancy("b", "Опыт с Kubernetes и Terraform", "Поддержка инфраструктуры"),
+            vacancy("c", "Java 17, Spring Boot", "Разработка микросервисов"),
+            vacancy("d", "React, TypeScript, Redux", "Верстка интерфейсов личного кабинета"),
+        ]
+
+        unique = deduplicator.add(empty + real)
+
+        self.assertEqual([item["id"] for item in unique], ["0", "1", "2", "3", "4", "a", "b", "c", "d"])
+        self.assertEqual(deduplicator.collapsed, 0)
+
+    def test_exact_duplicate_is_collapsed(self):
+        deduplicator = VacancyDeduplicator()
+        unique = deduplicator.add([
+            vacancy("1", REQUIREMENT, RESPONSIBILITY),
+            vacancy("2", f"<highlighttext>{REQUIREMENT.upper()}</highlighttext>", RESPONSIBILITY),
+        ])
+
+        self.assertEqual([item["id"] for item in unique], ["1"])
+        self.assertEqual(deduplicator.exact_duplicates, 1)
+        self.assertEqual(deduplicator.representative_of({"id": "2"}), "1")
+
+    def test_near_duplicate_pair_is_collapsed(self):
+        deduplicator = VacancyDeduplicator(threshold=0.8)
+        unique = deduplicator.add([
+            vacancy("1", REQUIREMENT, RESPONSIBILITY),
+            vacancy("2", REQUIREMENT.replace("от 3 лет", "от 2 лет"), RESPONSIBILITY),
+            vacancy("3", "Знание Go и gRPC", "Разработка платежного шлюза"),
+        ])
+
+        self.assertEqual([item["id"] for item in unique], ["1", "3"])
+        self.assertEqual(deduplicator.exact_duplicates, 0)
+        self.assertEqual(deduplicator.near_duplicates, 1)
+        self.assertEqual(deduplicator.representative_of({"id": "2"}), "1")
+
+    def test_same_vacancy_is_not_counted_as_duplicate(self):
+        deduplicator = VacancyDeduplicator()
+        deduplicator.add([vacancy("1", REQUIREMENT, RESPONSIBILITY)])
+        unique = deduplicator.add([vacancy("1", REQUIREMENT, RESPONSIBILITY)])
+
+        self.assertEqual(unique, [])
+        self.assertEqual(deduplicator.collapsed, 0)
+
+    def test_zero_threshold_collapses_only_exact_duplicates(self):
+        deduplicator = VacancyDeduplicator(threshold=0)
+        unique = deduplicator.add([
+            vacancy("1", REQUIREMENT, RESPONSIBILITY),
+            vacancy("2", REQUIREMENT.replace("от 3 лет", "от 2 лет"), RESPONSIBILITY),
+        ])
+
+        self.assertEqual(len(unique), 2)
+        self.assertEqual(deduplicator.collapsed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
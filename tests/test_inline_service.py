@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from services import inline_service
+from services.inline_service import InlineSearch
+
+
+def vacancy(vacancy_id: int, name: str) -> dict:
+    return {"id": str(vacancy_id), "name": name, "snippet": {"requirement": None, "responsibility": None}}
+
+
+class FakeHH:
+    """Подмена fetch_vacancies: отвечает заранее заданными результатами и запоминает запросы."""
+
+    def __init__(self, results: dict, delay: float = 0):
+        self.results = results
+        self.delay = delay
+        self.queries = []
+
+    async def __call__(self, query: str, page: int = 0, per_page: int = 10, **filters) -> dict:
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        items = self.results.get(query, [])[:per_page]
+        return {"items": items, "found": len(self.results.get(query, []))}
+
+
+class InlineSearchTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.search = InlineSearch()
+        patcher = mock.patch.object(inline_service, "INLINE_DEBOUNCE", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use_hh(self, hh: FakeHH):
+        patcher = mock.patch.object(inline_service, "fetch_vacancies", hh)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return hh
+
+    async def test_partial_word_is_not_answered_from_shorter_query(self):
+        hh = self.use_hh(FakeHH({"golang": [vacancy(1, "Golang developer")]}))
+
+        self.assertEqual(await self.search.lookup(1, "gol"), ([], True))
+        items, is_final = await self.search.lookup(1, "golang")
+
+        self.assertEqual([item["id"] for item in items], ["1"])
+        self.assertTrue(is_final)
+        self.assertEqual(hh.queries, ["gol", "golang"])
+
+    async def test_partial_word_is_not_answered_from_cache(self):
+        self.search._put_cached("pyt", inline_service.CachedResult([], 0))
+
+        self.assertIsNone(self.search._from_cache("python"))
+
+    async def test_added_word_is_filtered_from_complete_pool(self):
+        hh = self.use_hh(FakeHH({
+            "python": [vacancy(1, "Python Django developer"), vacancy(2, "Python data engineer")],
+        }))
+
+        await self.search.lookup(1, "python")
+        items, is_final = await self.search.lookup(1, "python django")
+
+        self.assertEqual([item["id"] for item in items], ["1"])
+        self.assertTrue(is_final)
+        self.assertEqual(hh.queries, ["python"])
+
+    async def test_added_word_queries_hh_when_pool_is_not_enough(self):
+        pool = [vacancy(i, "Python developer") for i in range(inline_service.INLINE_POOL_SIZE + 50)]
+        pool[0] = vacancy(0, "Python Django developer")
+        hh = self.use_hh(FakeHH({"python": pool, "python django": [vacancy(0, "Python Django developer")]}))
+
+        await self.search.lookup(1, "python")
+        self.assertIsNone(self.search._from_cache("python django"))
+        await self.search.lookup(1, "python django")
+
+        self.assertEqual(hh.queries, ["python", "python django"])
+
+    async def test_slow_hh_falls_back_to_prefix_as_non_final_answer(self):
+        self.search._put_cached("pyt", inline_service.CachedResult([vacancy(1, "Python developer")], 500))
+        self.use_hh(FakeHH({"python": [vacancy(2, "Python developer")]}, delay=1))
+
+        with mock.patch.object(inline_service, "INLINE_LATENCY_BUDGET", 0.05):
+            items, is_final = await self.search.lookup(1, "python")
+
+        self.assertEqual([item["id"] for item in items], ["1"])
+        self.assertFalse(is_final)
+
+
+if __name__ == "__main__":
+    unittest.main()